@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Shared fixtures for the test scripts - each expensive layer is built once per process
+"""
+import atexit
+from functools import lru_cache
+
+from backend.core import ChatbotCore
+from backend.nlp_layer import NLPLayer
+
+@lru_cache(maxsize=1)
+def get_chatbot():
+    """Return the shared chatbot, shut down when the process exits"""
+    chatbot = ChatbotCore()
+    atexit.register(chatbot.shutdown)
+    return chatbot
+
+@lru_cache(maxsize=1)
+def get_nlp():
+    """Return the shared NLP layer"""
+    return NLPLayer()
@@ -12,36 +12,37 @@ class AnalyticsLayer:
     
     def track_conversation(self, user_id, intent, sentiment, response_strategy, success, response_time=None):
         """Track a conversation for analytics"""
-        # Update total conversations
-        self.storage.analytics_data['total_conversations'] += 1
+        with self.storage.data_lock:
+            # Update total conversations
+            self.storage.analytics_data['total_conversations'] += 1
         
-        # Track user interactions
-        if user_id not in self.storage.analytics_data['user_interactions']:
-            self.storage.analytics_data['user_interactions'][user_id] = {
-                'total_messages': 0,
-                'first_interaction': datetime.now().isoformat(),
-                'last_interaction': datetime.now().isoformat(),
-                'intents': defaultdict(int),
-                'avg_sentiment': 0,
-                'sentiment_sum': 0
-            }
+            # Track user interactions
+            if user_id not in self.storage.analytics_data['user_interactions']:
+                self.storage.analytics_data['user_interactions'][user_id] = {
+                    'total_messages': 0,
+                    'first_interaction': datetime.now().isoformat(),
+                    'last_interaction': datetime.now().isoformat(),
+                    'intents': defaultdict(int),
+                    'avg_sentiment': 0,
+                    'sentiment_sum': 0
+                }
         
-        user_data = self.storage.analytics_data['user_interactions'][user_id]
-        user_data['total_messages'] += 1
-        user_data['last_interaction'] = datetime.now().isoformat()
-        user_data['intents'][intent] += 1
+            user_data = self.storage.analytics_data['user_interactions'][user_id]
+            user_data['total_messages'] += 1
+            user_data['last_interaction'] = datetime.now().isoformat()
+            user_data['intents'][intent] += 1
         
-        # Track sentiment
-        polarity = sentiment.get('polarity', 0)
-        user_data['sentiment_sum'] += polarity
-        user_data['avg_sentiment'] = user_data['sentiment_sum'] / user_data['total_messages']
+            # Track sentiment
+            polarity = sentiment.get('polarity', 0)
+            user_data['sentiment_sum'] += polarity
+            user_data['avg_sentiment'] = user_data['sentiment_sum'] / user_data['total_messages']
         
-        # Store records in storage layer
-        self.storage.store_intent_record(intent, 0.8, success)  # Default confidence
-        self.storage.store_sentiment_record(sentiment, user_id)
-        self.storage.store_response_success(response_strategy, success, 0.8, response_time)
+            # Store records in storage layer
+            self.storage.store_intent_record(intent, 0.8, success)  # Default confidence
+            self.storage.store_sentiment_record(sentiment, user_id)
+            self.storage.store_response_success(response_strategy, success, 0.8, response_time)
         
-        self.storage.save_analytics_data()
+            self.storage.save_analytics_data()
     
     def get_conversation_stats(self, days=30):
         """Get conversation statistics for the specified period"""
@@ -56,19 +57,17 @@ class AnalyticsLayer:
         }
         
         # Analyze chat data
-        for user_id, user_data in self.storage.chat_data.items():
-            for conversation in user_data['conversations']:
-                if conversation['timestamp'] > cutoff_iso:
-                    stats['total_conversations'] += 1
-                    stats['unique_users'].add(user_id)
-                    
-                    # Extract date and hour
-                    timestamp = datetime.fromisoformat(conversation['timestamp'])
-                    date_key = timestamp.strftime('%Y-%m-%d')
-                    hour_key = timestamp.hour
-                    
-                    stats['daily_activity'][date_key] += 1
-                    stats['hourly_activity'][hour_key] += 1
+        for user_id, conversation_ts in self.storage.get_conversations_since(cutoff_iso):
+            stats['total_conversations'] += 1
+            stats['unique_users'].add(user_id)
+            
+            # Extract date and hour
+            timestamp = datetime.fromisoformat(conversation_ts)
+            date_key = timestamp.strftime('%Y-%m-%d')
+            hour_key = timestamp.hour
+            
+            stats['daily_activity'][date_key] += 1
+            stats['hourly_activity'][hour_key] += 1
         
         stats['unique_users'] = len(stats['unique_users'])
         return dict(stats)
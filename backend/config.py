@@ -18,11 +18,19 @@ class Config:
     CONFIDENCE_THRESHOLD = float(os.getenv('CONFIDENCE_THRESHOLD', '0.6'))
     MAX_CONVERSATION_HISTORY = int(os.getenv('MAX_CONVERSATION_HISTORY', '10'))
     RESPONSE_TIMEOUT = int(os.getenv('RESPONSE_TIMEOUT', '30'))
+    ANALYTICS_FLUSH_INTERVAL = float(os.getenv('ANALYTICS_FLUSH_INTERVAL', '2'))
+    
+    # AI Provider Resilience
+    AI_FAILURE_TTL = int(os.getenv('AI_FAILURE_TTL', '60'))
+    CIRCUIT_BREAKER_THRESHOLD = int(os.getenv('CIRCUIT_BREAKER_THRESHOLD', '5'))
+    CIRCUIT_BREAKER_WINDOW = int(os.getenv('CIRCUIT_BREAKER_WINDOW', '60'))
+    CIRCUIT_BREAKER_COOLDOWN = int(os.getenv('CIRCUIT_BREAKER_COOLDOWN', '30'))
     
     # File Paths
     DATA_DIR = 'data'
     MODELS_DIR = 'models'
     CHAT_HISTORY_FILE = os.path.join(DATA_DIR, 'chat_history.json')
+    CHAT_DB_FILE = os.path.join(DATA_DIR, 'chat.sqlite')
     ANALYTICS_FILE = os.path.join(DATA_DIR, 'analytics.json')
     INTENT_MODEL_FILE = os.path.join(MODELS_DIR, 'intent_model.pkl')
     
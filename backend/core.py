@@ -1,7 +1,9 @@
 """
 Core Orchestrator - Coordinates all layers of the chatbot system
 """
+import threading
 import time
+from contextlib import nullcontext
 from datetime import datetime
 from backend.config import Config
 from backend.preprocessing import PreprocessingLayer
@@ -32,11 +34,36 @@ class ChatbotCore:
         self.analytics = AnalyticsLayer(self.storage)
         self.learning = LearningLayer(self.storage, self.nlp)
         
+        # Serializes the stateful layers so messages can be processed concurrently
+        self.state_lock = threading.Lock()
+        
         print("✅ All layers initialized successfully!")
     
     def process_message(self, user_message, user_id="default_user"):
         """Main message processing pipeline through all layers"""
-        start_time = time.time()
+        return self._process_message(user_message, user_id, self.state_lock, save=True)
+    
+    def process_batch(self, messages, user_id="default_user"):
+        """Process messages in order under one state_lock hold, saving learning data once"""
+        with self.state_lock:
+            process = self._process_message
+            unlocked = nullcontext()
+            responses = []
+            for message in messages:
+                responses.append(process(message, user_id, unlocked, save=False))
+                
+                # Wait for this message's commit before the next one may call an external
+                # API, so a SQLite write transaction never stays open across network I/O
+                # (the --full API server writes the same database from another process)
+                self.storage.flush()
+            
+            self.learning.save()
+        
+        return responses
+    
+    def _process_message(self, user_message, user_id, lock, save):
+        """Run the pipeline, recording the exchange under lock; save=False defers the learning write"""
+        start_time = time.perf_counter()
         
         try:
             # Layer 1: Preprocessing
@@ -65,24 +92,26 @@ class ChatbotCore:
             # Determine success based on confidence and strategy
             success = self._evaluate_response_success(response, decision)
             
-            # Layer 6: Storage
-            self.storage.store_conversation(
-                user_id, user_message, response['text'], intent, sentiment_result, success
-            )
-            
-            # Layer 7: Analytics
-            processing_time = time.time() - start_time
-            self.analytics.track_conversation(
-                user_id, intent, sentiment_result, response['strategy'], success, processing_time
-            )
-            
-            # Layer 8: Learning
-            self.learning.learn_from_conversation(
-                user_id, user_message, response, intent, sentiment_result, success
-            )
-            
-            # Update NLP context
-            self.nlp.update_context(user_id, user_message, response['text'], intent)
+            processing_time = time.perf_counter() - start_time
+            with lock:
+                # Layer 6: Storage
+                self.storage.store_conversation(
+                    user_id, user_message, response['text'], intent, sentiment_result, success
+                )
+                
+                # Layer 7: Analytics
+                self.analytics.track_conversation(
+                    user_id, intent, sentiment_result, response['strategy'], success, processing_time
+                )
+                
+                # Layer 8: Learning
+                self.learning.learn_from_conversation(
+                    user_id, user_message, response, intent, sentiment_result, success,
+                    save=save
+                )
+                
+                # Update NLP context
+                self.nlp.update_context(user_id, user_message, response['text'], intent)
             
             # Prepare final response
             final_response = {
@@ -113,7 +142,7 @@ class ChatbotCore:
                 'strategy': 'error_fallback',
                 'confidence': 0.3,
                 'success': False,
-                'processing_time': time.time() - start_time,
+                'processing_time': time.perf_counter() - start_time,
                 'timestamp': datetime.now().isoformat(),
                 'error': str(e)
             }
@@ -176,14 +205,15 @@ class ChatbotCore:
                 success = rating >= 3
                 
                 # Learn from feedback
-                self.learning.learn_from_conversation(
-                    user_id, 
-                    last_conversation['user_message'],
-                    {'strategy': 'feedback', 'confidence': rating / 5.0},
-                    last_conversation['intent'],
-                    last_conversation['sentiment'],
-                    success
-                )
+                with self.state_lock:
+                    self.learning.learn_from_conversation(
+                        user_id, 
+                        last_conversation['user_message'],
+                        {'strategy': 'feedback', 'confidence': rating / 5.0},
+                        last_conversation['intent'],
+                        last_conversation['sentiment'],
+                        success
+                    )
                 
                 return True
             
@@ -210,7 +240,7 @@ class ChatbotCore:
             },
             'system_metrics': {
                 'total_conversations': self.storage.analytics_data['total_conversations'],
-                'active_users': len(self.storage.chat_data),
+                'active_users': self.storage.count_users(),
                 'intent_model_loaded': self.nlp.intent_model is not None
             }
         }
@@ -220,27 +250,29 @@ class ChatbotCore:
     def optimize_system(self):
         """Run system optimization based on learning insights"""
         try:
-            optimization_results = {
-                'intent_model_retrained': False,
-                'patterns_discovered': 0,
-                'suggestions_generated': 0,
-                'data_cleaned': False
-            }
-            
-            # Generate optimization suggestions
-            suggestions = self.learning.generate_optimization_suggestions()
-            optimization_results['suggestions_generated'] = len(suggestions)
-            
-            # Attempt to improve intent classifier
-            if self.learning.improve_intent_classifier():
-                optimization_results['intent_model_retrained'] = True
-            
-            # Clean up old data
-            self.storage.cleanup_old_data()
-            optimization_results['data_cleaned'] = True
-            
-            # Count pattern discoveries
-            optimization_results['patterns_discovered'] = len(self.learning.learning_data['pattern_discoveries'])
+            # Retraining and cleanup read and rewrite state that process_message updates
+            with self.state_lock:
+                optimization_results = {
+                    'intent_model_retrained': False,
+                    'patterns_discovered': 0,
+                    'suggestions_generated': 0,
+                    'data_cleaned': False
+                }
+                
+                # Generate optimization suggestions
+                suggestions = self.learning.generate_optimization_suggestions()
+                optimization_results['suggestions_generated'] = len(suggestions)
+                
+                # Attempt to improve intent classifier
+                if self.learning.improve_intent_classifier():
+                    optimization_results['intent_model_retrained'] = True
+                
+                # Clean up old data
+                self.storage.cleanup_old_data()
+                optimization_results['data_cleaned'] = True
+                
+                # Count pattern discoveries
+                optimization_results['patterns_discovered'] = len(self.learning.learning_data['pattern_discoveries'])
             
             return optimization_results
             
@@ -251,8 +283,10 @@ class ChatbotCore:
     def get_system_statistics(self):
         """Get comprehensive system statistics"""
         try:
-            analytics_summary = self.storage.get_analytics_summary()
-            learning_insights = self.get_learning_insights()
+            # Snapshot under the lock so the dicts are not mutated mid-iteration
+            with self.state_lock:
+                analytics_summary = self.storage.get_analytics_summary()
+                learning_insights = self.get_learning_insights()
             
             return {
                 'analytics_summary': analytics_summary,
@@ -270,8 +304,7 @@ class ChatbotCore:
         print("Shutting down Layered AI Chatbot System...")
         
         # Save all data
-        self.storage.save_chat_history()
-        self.storage.save_analytics_data()
-        self.learning._save_learning_data()
+        self.storage.shutdown()
+        self.learning.save()
         
         print("✅ System shutdown complete!")
\ No newline at end of file
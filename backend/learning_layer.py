@@ -37,7 +37,11 @@ class LearningLayer:
         except Exception as e:
             print(f"Error saving learning data: {e}")
     
-    def learn_from_conversation(self, user_id, user_message, bot_response, intent, sentiment, success):
+    def save(self):
+        """Write learning data to disk, for callers that deferred it with save=False"""
+        self._save_learning_data()
+    
+    def learn_from_conversation(self, user_id, user_message, bot_response, intent, sentiment, success, save=True):
         """Learn from individual conversation exchanges"""
         
         # Record conversation outcome
@@ -63,7 +67,9 @@ class LearningLayer:
         # Update model performance tracking
         self._track_model_performance(intent, success)
         
-        self._save_learning_data()
+        # Batch callers pass save=False and write once at the end
+        if save:
+            self._save_learning_data()
     
     def _learn_intent_patterns(self, user_message, intent, success):
         """Learn and improve intent classification patterns"""
@@ -177,7 +183,7 @@ class LearningLayer:
         if not today_record:
             today_record = {
                 'date': today,
-                'intent_performance': defaultdict(lambda: {'total': 0, 'successful': 0}),
+                'intent_performance': {},
                 'overall_accuracy': 0
             }
             self.learning_data['model_performance_history'].append(today_record)
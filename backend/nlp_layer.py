@@ -3,11 +3,15 @@ NLP Processing Layer - Intent recognition, NER, and context management
 """
 import pickle
 import os
+from functools import lru_cache
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import Pipeline
 from backend.config import Config
 
+# Distinct messages whose intent is remembered until the model changes
+INTENT_CACHE_SIZE = 1024
+
 class NLPLayer:
     """Handles NLP processing including intent recognition and NER"""
     
@@ -15,6 +19,7 @@ class NLPLayer:
         self.config = Config()
         self.intent_model = None
         self.context_memory = {}
+        self._cached_intent = lru_cache(maxsize=INTENT_CACHE_SIZE)(self._classify_intent)
         self.load_or_train_intent_model()
     
     def load_or_train_intent_model(self):
@@ -23,6 +28,7 @@ class NLPLayer:
             try:
                 with open(self.config.INTENT_MODEL_FILE, 'rb') as f:
                     self.intent_model = pickle.load(f)
+                self._cached_intent.cache_clear()
                 return
             except:
                 pass
@@ -89,6 +95,7 @@ class NLPLayer:
         ])
         
         self.intent_model.fit(training_data, labels)
+        self._cached_intent.cache_clear()
         
         # Save model
         os.makedirs(self.config.MODELS_DIR, exist_ok=True)
@@ -100,6 +107,10 @@ class NLPLayer:
     
     def classify_intent(self, text, context=None):
         """Classify user intent using ML model and rules"""
+        return self._cached_intent(text)
+    
+    def _classify_intent(self, text):
+        """Uncached intent classification; results depend only on the text and model"""
         text_lower = text.lower().strip()
         
         # Priority 1: Greeting detection (must be first)
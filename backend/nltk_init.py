@@ -0,0 +1,15 @@
+"""
+NLTK Data Path - Points NLTK at the project-local nltk_data directory
+"""
+import os
+import sys
+
+# Kept in the project so downloads survive between runs and can be cached in CI
+NLTK_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'nltk_data')
+
+# nltk reads NLTK_DATA when it is first imported; child processes inherit it too
+os.environ.setdefault('NLTK_DATA', NLTK_DATA_DIR)
+
+# If nltk was imported before us, add the directory to its search path directly
+if 'nltk' in sys.modules and NLTK_DATA_DIR not in sys.modules['nltk'].data.path:
+    sys.modules['nltk'].data.path.insert(0, NLTK_DATA_DIR)
@@ -2,14 +2,100 @@
 Response Generation Layer - Generates responses using multiple strategies
 """
 import random
+import threading
+import time
+from collections import OrderedDict, deque
 import requests
 from backend.config import Config
+from backend.sentiment_layer import get_tone_plan
+
+# Fixed instructions kept as a constant leading prefix so providers with
+# prompt-prefix caching can reuse them across requests
+SYSTEM_PROMPT = (
+    "You are a helpful, knowledgeable AI assistant. Provide accurate, informative, and concise responses. "
+    "For technical topics like data science, explain concepts clearly with examples when appropriate. "
+    "Always give direct, specific answers to questions."
+)
+
+OPENROUTER_MODEL = "meta-llama/llama-3.2-3b-instruct:free"
+
+AI_RESPONSE_CACHE_SIZE = 2048
+AI_FAILURE_CACHE_SIZE = 1024
 
 class ResponseLayer:
     """Handles response generation using various strategies"""
     
     def __init__(self):
         self.config = Config()
+        
+        # Exact-match LRU of successful AI responses keyed by full prompt
+        self._ai_response_cache = OrderedDict()
+        self._ai_cache_lock = threading.Lock()
+        
+        # Recently failed (intent, text) keys -> expiry time, and per-provider
+        # circuit breakers (recent failure times, open-until time)
+        self._ai_failure_cache = OrderedDict()
+        self._provider_failures = {'openrouter': deque(), 'huggingface': deque()}
+        self._provider_open_until = {'openrouter': 0.0, 'huggingface': 0.0}
+    
+    def _get_cached_ai_response(self, prompt):
+        """Return a copy of a cached AI response for this exact prompt"""
+        with self._ai_cache_lock:
+            cached = self._ai_response_cache.get(prompt)
+            if cached is None:
+                return None
+            self._ai_response_cache.move_to_end(prompt)
+            return dict(cached)
+    
+    def _cache_ai_response(self, prompt, response):
+        """Remember a successful AI response, evicting the least recently used"""
+        with self._ai_cache_lock:
+            self._ai_response_cache[prompt] = dict(response)
+            self._ai_response_cache.move_to_end(prompt)
+            if len(self._ai_response_cache) > AI_RESPONSE_CACHE_SIZE:
+                self._ai_response_cache.popitem(last=False)
+    
+    def _is_recent_failure(self, failure_key):
+        """Check whether this request failed on every provider within the TTL"""
+        with self._ai_cache_lock:
+            expires_at = self._ai_failure_cache.get(failure_key)
+            if expires_at is None:
+                return False
+            if expires_at <= time.monotonic():
+                del self._ai_failure_cache[failure_key]
+                return False
+            return True
+    
+    def _record_failure(self, failure_key):
+        """Remember a request that failed on every provider"""
+        with self._ai_cache_lock:
+            self._ai_failure_cache[failure_key] = time.monotonic() + self.config.AI_FAILURE_TTL
+            self._ai_failure_cache.move_to_end(failure_key)
+            if len(self._ai_failure_cache) > AI_FAILURE_CACHE_SIZE:
+                self._ai_failure_cache.popitem(last=False)
+    
+    def _provider_available(self, provider):
+        """Check whether the provider's circuit breaker is closed"""
+        return time.monotonic() >= self._provider_open_until[provider]
+    
+    def _record_provider_result(self, provider, success):
+        """Update the provider's circuit breaker with a call outcome"""
+        with self._ai_cache_lock:
+            failures = self._provider_failures[provider]
+            if success:
+                failures.clear()
+                return
+            
+            now = time.monotonic()
+            failures.append(now)
+            while failures and failures[0] < now - self.config.CIRCUIT_BREAKER_WINDOW:
+                failures.popleft()
+            
+            # Too many failures in the window: skip this provider for a cooldown
+            if len(failures) >= self.config.CIRCUIT_BREAKER_THRESHOLD:
+                self._provider_open_until[provider] = now + self.config.CIRCUIT_BREAKER_COOLDOWN
+                failures.clear()
+                print(f"⚠️ {provider} circuit open for {self.config.CIRCUIT_BREAKER_COOLDOWN}s")
     
     def generate_rule_based_response(self, intent, sentiment, context=None):
         """Generate rule-based response from templates"""
@@ -50,25 +136,51 @@ class ResponseLayer:
         if not self.config.HUGGINGFACE_API_KEY or self.config.HUGGINGFACE_API_KEY == 'your_huggingface_key_here':
             print("⚠️ Hugging Face API key not configured")
         
+        # Exact repeats (retries, refreshes) are served without a network call
+        prompt = self._build_ai_prompt(text, intent, sentiment, context)
+        cached_response = self._get_cached_ai_response(prompt)
+        if cached_response:
+            return cached_response
+        
+        # Requests that just failed everywhere go straight to the rule-based fallback
+        failure_key = hash((intent, text[:128]))
+        if self._is_recent_failure(failure_key):
+            return self._generate_enhanced_rule_response(text, intent, sentiment, context)
+        
+        provider_attempted = False
+        
         # Try OpenRouter first (better for general questions)
-        if self.config.OPENROUTER_API_KEY and self.config.OPENROUTER_API_KEY != 'your_openrouter_key_here':
+        if (self.config.OPENROUTER_API_KEY and self.config.OPENROUTER_API_KEY != 'your_openrouter_key_here'
+                and self._provider_available('openrouter')):
+            provider_attempted = True
             ai_response = self._call_openrouter_api(text, intent, sentiment, context)
+            self._record_provider_result('openrouter', bool(ai_response))
             if ai_response:
-                return {
+                result = {
                     'text': ai_response,
                     'strategy': 'generative_ai',
                     'confidence': 0.9
                 }
+                self._cache_ai_response(prompt, result)
+                return result
         
         # Try Hugging Face as fallback
-        if self.config.HUGGINGFACE_API_KEY and self.config.HUGGINGFACE_API_KEY != 'your_huggingface_key_here':
-            ai_response = self._call_huggingface_api(text, intent, sentiment, context)
+        if (self.config.HUGGINGFACE_API_KEY and self.config.HUGGINGFACE_API_KEY != 'your_huggingface_key_here'
+                and self._provider_available('huggingface')):
+            provider_attempted = True
+            ai_response = self._call_huggingface_api(prompt)
+            self._record_provider_result('huggingface', bool(ai_response))
             if ai_response:
-                return {
+                result = {
                     'text': ai_response,
                     'strategy': 'generative_ai',
                     'confidence': 0.8
                 }
+                self._cache_ai_response(prompt, result)
+                return result
+        
+        if provider_attempted:
+            self._record_failure(failure_key)
         
         # If no API keys available, use enhanced rule-based responses
         return self._generate_enhanced_rule_response(text, intent, sentiment, context)
@@ -83,13 +195,10 @@ class ResponseLayer:
                 "X-Title": "Layered AI Chatbot"
             }
             
-            # Build context-aware prompt
-            prompt = self._build_ai_prompt(text, intent, sentiment, context)
-            
             data = {
-                "model": "meta-llama/llama-3.2-3b-instruct:free",
+                "model": OPENROUTER_MODEL,
                 "messages": [
-                    {"role": "system", "content": "You are a helpful, knowledgeable AI assistant. Provide accurate, informative, and concise responses. For technical topics like data science, explain concepts clearly with examples when appropriate. Always give direct, specific answers to questions."},
+                    self._build_system_message(OPENROUTER_MODEL),
                     {"role": "user", "content": text}
                 ],
                 "max_tokens": 300,
@@ -120,17 +229,14 @@ class ResponseLayer:
         
         return None
     
-    def _call_huggingface_api(self, text, intent, sentiment, context):
-        """Call Hugging Face API for AI response"""
+    def _call_huggingface_api(self, prompt):
+        """Call Hugging Face API for AI response, sending the prompt the cache is keyed on"""
         try:
             headers = {
                 "Authorization": f"Bearer {self.config.HUGGINGFACE_API_KEY}",
                 "Content-Type": "application/json"
             }
             
-            # Use a better model for text generation
-            prompt = self._build_ai_prompt(text, intent, sentiment, context)
-            
             data = {
                 "inputs": prompt,
                 "parameters": {
@@ -184,35 +290,38 @@ class ResponseLayer:
         
         return None
     
+    def _build_system_message(self, model):
+        """Build the system message, marked cacheable where the provider supports it"""
+        if model.startswith('anthropic/'):
+            return {
+                "role": "system",
+                "content": [
+                    {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+                ]
+            }
+        return {"role": "system", "content": SYSTEM_PROMPT}
+    
     def _build_ai_prompt(self, text, intent, sentiment, context):
         """Build context-aware prompt for AI generation"""
-        # Create a more natural conversation prompt
-        prompt = ""
+        # Stable system prefix first, dynamic conversation context after it
+        parts = [SYSTEM_PROMPT, "\n\n"]
         
         # Add conversation context if available
         if context and context.get('history'):
             recent_history = context['history'][-2:]
-            for exchange in recent_history:
-                prompt += f"Human: {exchange['user']}\nAssistant: {exchange['bot']}\n"
+            parts.append("".join(
+                f"Human: {exchange['user']}\nAssistant: {exchange['bot']}\n"
+                for exchange in recent_history
+            ))
         
         # Add current user message
-        prompt += f"Human: {text}\nAssistant:"
+        parts.append(f"Human: {text}\nAssistant:")
         
-        return prompt
+        return "".join(parts)
     
     def _get_tone_instruction(self, sentiment):
         """Get tone instruction based on sentiment"""
-        sentiment_label = sentiment.get('sentiment', 'neutral')
-        emotions = sentiment.get('emotions', [])
-        
-        if sentiment_label == 'negative' or 'anger' in emotions:
-            return "Respond with empathy and understanding."
-        elif sentiment_label == 'positive' or 'joy' in emotions:
-            return "Respond with enthusiasm and positivity."
-        elif 'fear' in emotions or 'sadness' in emotions:
-            return "Respond with reassurance and support."
-        else:
-            return "Respond in a helpful and professional manner."
+        return get_tone_plan(sentiment).instruction
     
     def generate_fallback_response(self, fallback_type, sentiment, context=None):
         """Generate fallback responses when other strategies fail"""
@@ -245,26 +354,13 @@ class ResponseLayer:
     
     def _apply_tone_modifications(self, response, sentiment):
         """Apply tone modifications based on sentiment"""
-        sentiment_label = sentiment.get('sentiment', 'neutral')
-        emotions = sentiment.get('emotions', [])
+        plan = get_tone_plan(sentiment)
         
-        # Add empathy for negative sentiment
-        if sentiment_label == 'negative' or 'anger' in emotions:
-            empathy_prefixes = [
-                "I understand that can be concerning. ",
-                "I can see why that might be frustrating. ",
-                "I hear you, and I want to help. "
-            ]
-            response = random.choice(empathy_prefixes) + response
-        
-        # Add enthusiasm for positive sentiment
-        elif sentiment_label == 'positive' or 'joy' in emotions:
-            enthusiasm_suffixes = [
-                " I'm excited to help!",
-                " This sounds great!",
-                " I'm happy to assist!"
-            ]
-            response = response + random.choice(enthusiasm_suffixes)
+        # Add empathy for negative sentiment, enthusiasm for positive sentiment
+        if plan.empathy_prefix_pool:
+            response = random.choice(plan.empathy_prefix_pool) + response
+        elif plan.enthusiasm_suffix_pool:
+            response = response + random.choice(plan.enthusiasm_suffix_pool)
         
         return response
     
@@ -1,27 +1,133 @@
 """
 Sentiment & Emotion Analysis Layer - Polarity detection and emotion classification
 """
+from collections import namedtuple
+from functools import lru_cache
+import backend.nltk_init  # before textblob, so its corpora load from nltk_data
 from textblob import TextBlob
 
+# Emotion keyword mappings
+EMOTION_KEYWORDS = {
+    'joy': ['happy', 'excited', 'great', 'wonderful', 'amazing', 'fantastic', 'love', 'enjoy'],
+    'sadness': ['sad', 'depressed', 'unhappy', 'disappointed', 'upset', 'down', 'miserable'],
+    'anger': ['angry', 'mad', 'furious', 'annoyed', 'frustrated', 'irritated', 'hate'],
+    'fear': ['scared', 'afraid', 'worried', 'anxious', 'nervous', 'terrified', 'panic'],
+    'surprise': ['surprised', 'shocked', 'amazed', 'astonished', 'unexpected', 'wow'],
+    'disgust': ['disgusted', 'sick', 'revolted', 'appalled', 'repulsed', 'gross']
+}
+
+# Tone plan shared by the sentiment and response layers
+TonePlan = namedtuple('TonePlan', ['empathy_prefix_pool', 'enthusiasm_suffix_pool', 'instruction', 'tone_levels'])
+
+EMPATHY_PREFIXES = (
+    "I understand that can be concerning. ",
+    "I can see why that might be frustrating. ",
+    "I hear you, and I want to help. "
+)
+
+ENTHUSIASM_SUFFIXES = (
+    " I'm excited to help!",
+    " This sounds great!",
+    " I'm happy to assist!"
+)
+
+def _build_tone_plan(sentiment, emotion):
+    """Resolve the tone cascade for one (sentiment, primary emotion) pair"""
+    # Response decoration: empathy for negative, enthusiasm for positive
+    if sentiment == 'negative' or emotion == 'anger':
+        prefixes, suffixes = EMPATHY_PREFIXES, ()
+    elif sentiment == 'positive' or emotion == 'joy':
+        prefixes, suffixes = (), ENTHUSIASM_SUFFIXES
+    else:
+        prefixes, suffixes = (), ()
+    
+    # Instruction for generative responses
+    if sentiment == 'negative' or emotion == 'anger':
+        instruction = "Respond with empathy and understanding."
+    elif sentiment == 'positive' or emotion == 'joy':
+        instruction = "Respond with enthusiasm and positivity."
+    elif emotion in ('fear', 'sadness'):
+        instruction = "Respond with reassurance and support."
+    else:
+        instruction = "Respond in a helpful and professional manner."
+    
+    tone_levels = {
+        'empathy_level': 'medium',
+        'enthusiasm_level': 'medium',
+        'formality_level': 'medium',
+        'supportiveness': 'medium'
+    }
+    
+    # Adjust based on sentiment
+    if sentiment == 'negative':
+        tone_levels['empathy_level'] = 'high'
+        tone_levels['supportiveness'] = 'high'
+        tone_levels['enthusiasm_level'] = 'low'
+    elif sentiment == 'positive':
+        tone_levels['enthusiasm_level'] = 'high'
+        tone_levels['empathy_level'] = 'medium'
+    
+    # Adjust based on specific emotions
+    if emotion == 'anger':
+        tone_levels['empathy_level'] = 'high'
+        tone_levels['formality_level'] = 'high'
+        tone_levels['enthusiasm_level'] = 'low'
+    elif emotion == 'sadness':
+        tone_levels['empathy_level'] = 'high'
+        tone_levels['supportiveness'] = 'high'
+    elif emotion == 'joy':
+        tone_levels['enthusiasm_level'] = 'high'
+    elif emotion == 'fear':
+        tone_levels['supportiveness'] = 'high'
+        tone_levels['empathy_level'] = 'high'
+    
+    return TonePlan(prefixes, suffixes, instruction, tone_levels)
+
+# Precomputed at import so each message needs a single dict lookup
+TONE_TABLE = {
+    (sentiment, emotion): _build_tone_plan(sentiment, emotion)
+    for sentiment in ('positive', 'negative', 'neutral')
+    for emotion in (None, *EMOTION_KEYWORDS)
+}
+
+DEFAULT_PLAN = TONE_TABLE[('neutral', None)]
+
+def get_tone_plan(sentiment_data):
+    """Get the tone plan for a sentiment result"""
+    key = (sentiment_data.get('sentiment', 'neutral'), sentiment_data.get('primary_emotion'))
+    return TONE_TABLE.get(key, DEFAULT_PLAN)
+
+@lru_cache(maxsize=4096)
+def _polarity(text_lower):
+    """Cached TextBlob (polarity, subjectivity) for normalized text"""
+    sentiment = TextBlob(text_lower).sentiment
+    return sentiment.polarity, sentiment.subjectivity
+
+@lru_cache(maxsize=4096)
+def _emotion_scores(text_lower):
+    """Cached (emotion, score) pairs for normalized text"""
+    scores = []
+    for emotion, keywords in EMOTION_KEYWORDS.items():
+        score = 0
+        for keyword in keywords:
+            if keyword in text_lower:
+                score += 1
+        
+        if score > 0:
+            scores.append((emotion, score / len(keywords)))
+    
+    return tuple(scores)
+
 class SentimentLayer:
     """Handles sentiment analysis and emotion detection"""
     
     def __init__(self):
-        # Emotion keyword mappings
-        self.emotion_keywords = {
-            'joy': ['happy', 'excited', 'great', 'wonderful', 'amazing', 'fantastic', 'love', 'enjoy'],
-            'sadness': ['sad', 'depressed', 'unhappy', 'disappointed', 'upset', 'down', 'miserable'],
-            'anger': ['angry', 'mad', 'furious', 'annoyed', 'frustrated', 'irritated', 'hate'],
-            'fear': ['scared', 'afraid', 'worried', 'anxious', 'nervous', 'terrified', 'panic'],
-            'surprise': ['surprised', 'shocked', 'amazed', 'astonished', 'unexpected', 'wow'],
-            'disgust': ['disgusted', 'sick', 'revolted', 'appalled', 'repulsed', 'gross']
-        }
+        self.emotion_keywords = EMOTION_KEYWORDS
     
     def analyze_polarity(self, text):
         """Analyze sentiment polarity using TextBlob"""
-        blob = TextBlob(text)
-        polarity = blob.sentiment.polarity  # -1 to 1
-        subjectivity = blob.sentiment.subjectivity  # 0 to 1
+        # Normalize so repeated utterances hit the cache
+        polarity, subjectivity = _polarity(text.strip().lower())  # -1 to 1, 0 to 1
         
         # Classify sentiment
         if polarity > 0.1:
@@ -40,21 +146,11 @@ class SentimentLayer:
     
     def detect_emotions(self, text):
         """Detect specific emotions in text"""
-        text_lower = text.lower()
-        detected_emotions = []
-        emotion_scores = {}
+        text_lower = text.strip().lower()
+        emotion_scores = dict(_emotion_scores(text_lower))
+        detected_emotions = list(emotion_scores)
         
-        for emotion, keywords in self.emotion_keywords.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in text_lower:
-                    score += 1
-            
-            if score > 0:
-                emotion_scores[emotion] = score / len(keywords)
-                detected_emotions.append(emotion)
-        
-        primary_emotion = max(emotion_scores.keys(), key=emotion_scores.get) if emotion_scores else None
+        primary_emotion = max(emotion_scores, key=emotion_scores.__getitem__, default=None)
         
         return {
             'emotions': detected_emotions,
@@ -64,40 +160,7 @@ class SentimentLayer:
     
     def get_tone_suggestions(self, sentiment_data):
         """Get tone suggestions for response based on sentiment"""
-        sentiment = sentiment_data['sentiment']
-        emotions = sentiment_data.get('emotions', [])
-        
-        tone_suggestions = {
-            'empathy_level': 'medium',
-            'enthusiasm_level': 'medium',
-            'formality_level': 'medium',
-            'supportiveness': 'medium'
-        }
-        
-        # Adjust based on sentiment
-        if sentiment == 'negative':
-            tone_suggestions['empathy_level'] = 'high'
-            tone_suggestions['supportiveness'] = 'high'
-            tone_suggestions['enthusiasm_level'] = 'low'
-        elif sentiment == 'positive':
-            tone_suggestions['enthusiasm_level'] = 'high'
-            tone_suggestions['empathy_level'] = 'medium'
-        
-        # Adjust based on specific emotions
-        if 'anger' in emotions:
-            tone_suggestions['empathy_level'] = 'high'
-            tone_suggestions['formality_level'] = 'high'
-            tone_suggestions['enthusiasm_level'] = 'low'
-        elif 'sadness' in emotions:
-            tone_suggestions['empathy_level'] = 'high'
-            tone_suggestions['supportiveness'] = 'high'
-        elif 'joy' in emotions:
-            tone_suggestions['enthusiasm_level'] = 'high'
-        elif 'fear' in emotions:
-            tone_suggestions['supportiveness'] = 'high'
-            tone_suggestions['empathy_level'] = 'high'
-        
-        return tone_suggestions
+        return dict(get_tone_plan(sentiment_data).tone_levels)
     
     def analyze(self, text):
         """Main sentiment analysis pipeline"""
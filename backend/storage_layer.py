@@ -1,9 +1,14 @@
 """
 Data Storage Layer - Handles persistent data storage and retrieval
 """
-import json
+import atexit
 import os
+import queue
+import sqlite3
+import threading
+import time
 from datetime import datetime
+import orjson
 from backend.config import Config
 
 class StorageLayer:
@@ -11,28 +16,149 @@ class StorageLayer:
     
     def __init__(self):
         self.config = Config()
-        self.chat_data = self._load_chat_history()
-        self.analytics_data = self._load_analytics_data()
         
         # Ensure data directories exist
         os.makedirs(self.config.DATA_DIR, exist_ok=True)
+        
+        # Guards chat/analytics data against the background writer
+        self.data_lock = threading.RLock()
+        
+        self.chat_db = self._open_chat_db()
+        self._load_chat_history()
+        self.analytics_data = self._load_analytics_data()
+        
+        # Analytics are aggregated in memory and flushed periodically
+        self._analytics_dirty = False
+        self._last_analytics_flush = time.monotonic()
+        
+        # Background worker that performs disk writes off the request thread
+        self._io_queue = queue.SimpleQueue()
+        self._io_thread = threading.Thread(target=self._io_worker, daemon=True)
+        self._io_thread.start()
+        
+        atexit.register(self.shutdown)
+    
+    def _io_worker(self):
+        """Run queued I/O operations until a stop sentinel is received"""
+        interval = self.config.ANALYTICS_FLUSH_INTERVAL
+        while True:
+            try:
+                op, payload = self._io_queue.get(timeout=interval)
+            except queue.Empty:
+                pass
+            else:
+                if op is None:
+                    break
+                try:
+                    op(payload)
+                except Exception as e:
+                    print(f"Error in storage worker: {e}")
+            
+            # Write analytics at most once per flush interval
+            if self._analytics_dirty and time.monotonic() - self._last_analytics_flush >= interval:
+                self._write_analytics_data()
+    
+    def _submit(self, op, payload=None):
+        """Queue an I/O operation, running it inline if the worker has stopped"""
+        if self._io_thread.is_alive():
+            self._io_queue.put((op, payload))
+        else:
+            op(payload)
+    
+    def _write_json(self, path, data):
+        """Atomically write data as JSON via orjson (temp file + rename)"""
+        tmp_path = f"{path}.tmp"
+        with self.data_lock:
+            serialized = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+        with open(tmp_path, 'wb') as f:
+            f.write(serialized)
+        os.replace(tmp_path, path)
+    
+    def _write_chat_history(self, _payload=None):
+        """Commit pending chat history changes (runs on the I/O worker)"""
+        try:
+            with self.data_lock:
+                self.chat_db.commit()
+        except Exception as e:
+            print(f"Error saving chat history: {e}")
+    
+    def _write_analytics_data(self, _payload=None):
+        """Write analytics data to file (runs on the I/O worker)"""
+        self._analytics_dirty = False
+        self._last_analytics_flush = time.monotonic()
+        try:
+            self._write_json(self.config.ANALYTICS_FILE, self.analytics_data)
+        except Exception as e:
+            print(f"Error saving analytics data: {e}")
+    
+    def _open_chat_db(self):
+        """Open the SQLite chat database, creating its schema if needed"""
+        conn = sqlite3.connect(self.config.CHAT_DB_FILE, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS users (
+                user_id TEXT PRIMARY KEY,
+                profile_json TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS conversations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                ts TEXT NOT NULL,
+                user_message TEXT,
+                bot_response TEXT,
+                intent TEXT,
+                sentiment_json TEXT,
+                success INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_conversations_user ON conversations (user_id, id);
+            CREATE INDEX IF NOT EXISTS idx_conversations_ts ON conversations (ts);
+        """)
+        return conn
     
     def _load_chat_history(self):
-        """Load chat history from file"""
+        """Import legacy chat_history.json into the chat database once.
+        
+        Conversations are otherwise read on demand, so startup no longer
+        parses the whole history.
+        """
+        # user_version marks the one-time import as done
+        if self.chat_db.execute('PRAGMA user_version').fetchone()[0] >= 1:
+            return
+        
+        chat_data = {}
         if os.path.exists(self.config.CHAT_HISTORY_FILE):
             try:
-                with open(self.config.CHAT_HISTORY_FILE, 'r') as f:
-                    return json.load(f)
+                with open(self.config.CHAT_HISTORY_FILE, 'rb') as f:
+                    chat_data = orjson.loads(f.read())
             except:
                 pass
-        return {}
+        
+        with self.data_lock:
+            for user_id, user_data in chat_data.items():
+                self.chat_db.execute(
+                    'INSERT OR REPLACE INTO users (user_id, profile_json) VALUES (?, ?)',
+                    (user_id, orjson.dumps(user_data.get('user_profile', {})).decode())
+                )
+                self.chat_db.executemany(
+                    'INSERT INTO conversations (user_id, ts, user_message, bot_response, intent, sentiment_json, success) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    [
+                        (user_id, conv['timestamp'], conv.get('user_message'), conv.get('bot_response'),
+                         conv.get('intent'), orjson.dumps(conv.get('sentiment', {})).decode(),
+                         int(bool(conv.get('success', True))))
+                        for conv in user_data.get('conversations', [])
+                    ]
+                )
+            self.chat_db.execute('PRAGMA user_version = 1')
+            self.chat_db.commit()
     
     def _load_analytics_data(self):
         """Load analytics data from file"""
         if os.path.exists(self.config.ANALYTICS_FILE):
             try:
-                with open(self.config.ANALYTICS_FILE, 'r') as f:
-                    return json.load(f)
+                with open(self.config.ANALYTICS_FILE, 'rb') as f:
+                    return orjson.loads(f.read())
             except:
                 pass
         return {
@@ -45,160 +171,212 @@ class StorageLayer:
         }
     
     def save_chat_history(self):
-        """Save chat history to file"""
-        try:
-            with open(self.config.CHAT_HISTORY_FILE, 'w') as f:
-                json.dump(self.chat_data, f, indent=2)
-        except Exception as e:
-            print(f"Error saving chat history: {e}")
+        """Queue chat history to be saved to file"""
+        self._submit(self._write_chat_history)
     
     def save_analytics_data(self):
-        """Save analytics data to file"""
-        try:
-            with open(self.config.ANALYTICS_FILE, 'w') as f:
-                json.dump(self.analytics_data, f, indent=2)
-        except Exception as e:
-            print(f"Error saving analytics data: {e}")
+        """Mark analytics data for the next periodic flush"""
+        self._analytics_dirty = True
+    
+    def _write_analytics_if_dirty(self, _payload=None):
+        """Write analytics data now if it has unsaved changes"""
+        if self._analytics_dirty:
+            self._write_analytics_data()
+    
+    def flush(self, timeout=None):
+        """Block until all queued writes, including dirty analytics, have completed"""
+        done = threading.Event()
+        self._submit(self._write_analytics_if_dirty)
+        self._submit(lambda _payload: done.set())
+        return done.wait(timeout)
+    
+    def shutdown(self):
+        """Flush pending writes and stop the background worker"""
+        self.save_chat_history()
+        self.flush()
+        if self._io_thread.is_alive():
+            self._io_queue.put((None, None))
+            self._io_thread.join()
     
     def store_conversation(self, user_id, user_message, bot_response, intent, sentiment, success=True):
         """Store a conversation exchange"""
-        timestamp = datetime.now().isoformat()
+        with self.data_lock:
+            timestamp = datetime.now().isoformat()
         
-        # Initialize user data if not exists
-        if user_id not in self.chat_data:
-            self.chat_data[user_id] = {
-                'conversations': [],
-                'user_profile': {
+            # Initialize user profile if not exists
+            profile = self.get_user_profile(user_id)
+            if profile is None:
+                profile = {
                     'first_interaction': timestamp,
                     'total_messages': 0,
                     'preferred_intents': {},
                     'sentiment_history': []
                 }
-            }
         
-        # Store conversation
-        conversation_entry = {
-            'timestamp': timestamp,
-            'user_message': user_message,
-            'bot_response': bot_response,
-            'intent': intent,
-            'sentiment': sentiment,
-            'success': success
-        }
+            # Store conversation with a compact sentiment slice; verbose fields
+            # (emotion scores, tone suggestions) are not needed for history
+            compact_sentiment = {
+                'sentiment': sentiment.get('sentiment', 'neutral'),
+                'polarity': round(sentiment.get('polarity', 0), 3),
+                'primary_emotion': sentiment.get('primary_emotion')
+            }
+            self.chat_db.execute(
+                'INSERT INTO conversations (user_id, ts, user_message, bot_response, intent, sentiment_json, success) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (user_id, timestamp, user_message, bot_response, intent,
+                 orjson.dumps(compact_sentiment).decode(), int(bool(success)))
+            )
         
-        self.chat_data[user_id]['conversations'].append(conversation_entry)
+            # Update user profile
+            profile['total_messages'] += 1
+            profile['last_interaction'] = timestamp
         
-        # Update user profile
-        profile = self.chat_data[user_id]['user_profile']
-        profile['total_messages'] += 1
-        profile['last_interaction'] = timestamp
+            # Track preferred intents
+            if intent not in profile['preferred_intents']:
+                profile['preferred_intents'][intent] = 0
+            profile['preferred_intents'][intent] += 1
         
-        # Track preferred intents
-        if intent not in profile['preferred_intents']:
-            profile['preferred_intents'][intent] = 0
-        profile['preferred_intents'][intent] += 1
+            # Track sentiment history
+            profile['sentiment_history'].append({
+                'timestamp': timestamp,
+                'sentiment': sentiment.get('sentiment', 'neutral'),
+                'polarity': sentiment.get('polarity', 0)
+            })
         
-        # Track sentiment history
-        profile['sentiment_history'].append({
-            'timestamp': timestamp,
-            'sentiment': sentiment.get('sentiment', 'neutral'),
-            'polarity': sentiment.get('polarity', 0)
-        })
+            # Keep only recent sentiment history (trimmed in place, no list copy)
+            if len(profile['sentiment_history']) > 50:
+                del profile['sentiment_history'][:-50]
         
-        # Keep only recent sentiment history
-        if len(profile['sentiment_history']) > 50:
-            profile['sentiment_history'] = profile['sentiment_history'][-50:]
+            self.chat_db.execute(
+                'INSERT OR REPLACE INTO users (user_id, profile_json) VALUES (?, ?)',
+                (user_id, orjson.dumps(profile, option=orjson.OPT_SERIALIZE_NUMPY).decode())
+            )
         
-        # Keep only recent conversations
-        if len(self.chat_data[user_id]['conversations']) > 100:
-            self.chat_data[user_id]['conversations'] = self.chat_data[user_id]['conversations'][-100:]
+            # Keep only recent conversations
+            self.chat_db.execute(
+                'DELETE FROM conversations WHERE user_id = ? AND id <= '
+                '(SELECT id FROM conversations WHERE user_id = ? ORDER BY id DESC LIMIT 1 OFFSET 100)',
+                (user_id, user_id)
+            )
         
-        self.save_chat_history()
+            self.save_chat_history()
     
     def store_intent_record(self, intent, confidence, success):
         """Store intent classification record"""
-        if intent not in self.analytics_data['intent_counts']:
-            self.analytics_data['intent_counts'][intent] = {
-                'total': 0,
-                'successful': 0,
-                'avg_confidence': 0,
-                'confidence_sum': 0
-            }
+        with self.data_lock:
+            if intent not in self.analytics_data['intent_counts']:
+                self.analytics_data['intent_counts'][intent] = {
+                    'total': 0,
+                    'successful': 0,
+                    'avg_confidence': 0,
+                    'confidence_sum': 0
+                }
         
-        intent_data = self.analytics_data['intent_counts'][intent]
-        intent_data['total'] += 1
-        intent_data['confidence_sum'] += confidence
-        intent_data['avg_confidence'] = intent_data['confidence_sum'] / intent_data['total']
+            intent_data = self.analytics_data['intent_counts'][intent]
+            intent_data['total'] += 1
+            intent_data['confidence_sum'] += confidence
+            intent_data['avg_confidence'] = intent_data['confidence_sum'] / intent_data['total']
         
-        if success:
-            intent_data['successful'] += 1
+            if success:
+                intent_data['successful'] += 1
         
-        self.save_analytics_data()
+            self._analytics_dirty = True
     
     def store_sentiment_record(self, sentiment_data, user_id):
         """Store sentiment analysis record"""
-        sentiment_record = {
-            'timestamp': datetime.now().isoformat(),
-            'user_id': user_id,
-            'sentiment': sentiment_data.get('sentiment', 'neutral'),
-            'polarity': sentiment_data.get('polarity', 0),
-            'emotions': sentiment_data.get('emotions', []),
-            'primary_emotion': sentiment_data.get('primary_emotion')
-        }
+        with self.data_lock:
+            sentiment_record = {
+                'timestamp': datetime.now().isoformat(),
+                'user_id': user_id,
+                'sentiment': sentiment_data.get('sentiment', 'neutral'),
+                'polarity': sentiment_data.get('polarity', 0),
+                'emotions': sentiment_data.get('emotions', []),
+                'primary_emotion': sentiment_data.get('primary_emotion')
+            }
         
-        self.analytics_data['sentiment_records'].append(sentiment_record)
+            self.analytics_data['sentiment_records'].append(sentiment_record)
         
-        # Keep only recent records
-        if len(self.analytics_data['sentiment_records']) > 1000:
-            self.analytics_data['sentiment_records'] = self.analytics_data['sentiment_records'][-1000:]
+            # Keep only recent records
+            if len(self.analytics_data['sentiment_records']) > 1000:
+                self.analytics_data['sentiment_records'] = self.analytics_data['sentiment_records'][-1000:]
         
-        self.save_analytics_data()
+            self._analytics_dirty = True
     
     def store_response_success(self, strategy, success, confidence, response_time=None):
         """Store response generation success/failure"""
-        record = {
-            'timestamp': datetime.now().isoformat(),
-            'strategy': strategy,
-            'success': success,
-            'confidence': confidence,
-            'response_time': response_time
-        }
+        with self.data_lock:
+            record = {
+                'timestamp': datetime.now().isoformat(),
+                'strategy': strategy,
+                'success': success,
+                'confidence': confidence,
+                'response_time': response_time
+            }
         
-        if success:
-            self.analytics_data['response_success'].append(record)
-            # Keep only recent successful responses
-            if len(self.analytics_data['response_success']) > 500:
-                self.analytics_data['response_success'] = self.analytics_data['response_success'][-500:]
-        else:
-            self.analytics_data['failed_responses'].append(record)
-            # Keep only recent failed responses
-            if len(self.analytics_data['failed_responses']) > 200:
-                self.analytics_data['failed_responses'] = self.analytics_data['failed_responses'][-200:]
+            if success:
+                self.analytics_data['response_success'].append(record)
+                # Keep only recent successful responses
+                if len(self.analytics_data['response_success']) > 500:
+                    self.analytics_data['response_success'] = self.analytics_data['response_success'][-500:]
+            else:
+                self.analytics_data['failed_responses'].append(record)
+                # Keep only recent failed responses
+                if len(self.analytics_data['failed_responses']) > 200:
+                    self.analytics_data['failed_responses'] = self.analytics_data['failed_responses'][-200:]
         
-        self.save_analytics_data()
+            self._analytics_dirty = True
     
     def get_user_history(self, user_id, limit=10):
         """Get conversation history for a user"""
-        if user_id not in self.chat_data:
-            return []
+        with self.data_lock:
+            rows = self.chat_db.execute(
+                'SELECT ts, user_message, bot_response, intent, sentiment_json, success '
+                'FROM conversations WHERE user_id = ? ORDER BY id DESC LIMIT ?',
+                (user_id, limit)
+            ).fetchall()
         
-        conversations = self.chat_data[user_id]['conversations']
-        return conversations[-limit:] if conversations else []
+        return [
+            {
+                'timestamp': ts,
+                'user_message': user_message,
+                'bot_response': bot_response,
+                'intent': intent,
+                'sentiment': orjson.loads(sentiment_json) if sentiment_json else {},
+                'success': bool(success)
+            }
+            for ts, user_message, bot_response, intent, sentiment_json, success in reversed(rows)
+        ]
     
     def get_user_profile(self, user_id):
         """Get user profile data"""
-        if user_id not in self.chat_data:
-            return None
+        with self.data_lock:
+            row = self.chat_db.execute(
+                'SELECT profile_json FROM users WHERE user_id = ?', (user_id,)
+            ).fetchone()
         
-        return self.chat_data[user_id]['user_profile']
+        return orjson.loads(row[0]) if row else None
+    
+    def count_users(self):
+        """Get the number of users with stored conversations"""
+        with self.data_lock:
+            return self.chat_db.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+    
+    def count_conversations(self):
+        """Get the number of stored conversations"""
+        with self.data_lock:
+            return self.chat_db.execute('SELECT COUNT(*) FROM conversations').fetchone()[0]
+    
+    def get_conversations_since(self, cutoff_iso):
+        """Get (user_id, timestamp) pairs for conversations after the cutoff"""
+        with self.data_lock:
+            return self.chat_db.execute(
+                'SELECT user_id, ts FROM conversations WHERE ts > ?', (cutoff_iso,)
+            ).fetchall()
     
     def get_analytics_summary(self):
         """Get analytics summary"""
         # Calculate total conversations
-        total_conversations = sum(
-            len(user_data['conversations']) 
-            for user_data in self.chat_data.values()
-        )
+        total_conversations = self.count_conversations()
         
         # Calculate intent success rates
         intent_success_rates = {}
@@ -235,7 +413,7 @@ class StorageLayer:
         
         return {
             'total_conversations': total_conversations,
-            'total_users': len(self.chat_data),
+            'total_users': self.count_users(),
             'intent_success_rates': intent_success_rates,
             'sentiment_distribution': sentiment_distribution,
             'strategy_effectiveness': strategy_effectiveness,
@@ -244,39 +422,34 @@ class StorageLayer:
     
     def cleanup_old_data(self, days_to_keep=30):
         """Clean up old data beyond retention period"""
-        from datetime import timedelta
-        cutoff_date = datetime.now() - timedelta(days=days_to_keep)
-        cutoff_iso = cutoff_date.isoformat()
+        with self.data_lock:
+            from datetime import timedelta
+            cutoff_date = datetime.now() - timedelta(days=days_to_keep)
+            cutoff_iso = cutoff_date.isoformat()
+        
+            # Clean up old conversations
+            self.chat_db.execute('DELETE FROM conversations WHERE ts <= ?', (cutoff_iso,))
         
-        # Clean up old conversations
-        for user_id in list(self.chat_data.keys()):
-            user_data = self.chat_data[user_id]
-            
-            # Filter conversations
-            user_data['conversations'] = [
-                conv for conv in user_data['conversations']
-                if conv['timestamp'] > cutoff_iso
-            ]
-            
             # Remove users with no recent conversations
-            if not user_data['conversations']:
-                del self.chat_data[user_id]
+            self.chat_db.execute(
+                'DELETE FROM users WHERE user_id NOT IN (SELECT DISTINCT user_id FROM conversations)'
+            )
         
-        # Clean up old analytics records
-        self.analytics_data['sentiment_records'] = [
-            record for record in self.analytics_data['sentiment_records']
-            if record['timestamp'] > cutoff_iso
-        ]
+            # Clean up old analytics records
+            self.analytics_data['sentiment_records'] = [
+                record for record in self.analytics_data['sentiment_records']
+                if record['timestamp'] > cutoff_iso
+            ]
         
-        self.analytics_data['response_success'] = [
-            record for record in self.analytics_data['response_success']
-            if record['timestamp'] > cutoff_iso
-        ]
+            self.analytics_data['response_success'] = [
+                record for record in self.analytics_data['response_success']
+                if record['timestamp'] > cutoff_iso
+            ]
         
-        self.analytics_data['failed_responses'] = [
-            record for record in self.analytics_data['failed_responses']
-            if record['timestamp'] > cutoff_iso
-        ]
+            self.analytics_data['failed_responses'] = [
+                record for record in self.analytics_data['failed_responses']
+                if record['timestamp'] > cutoff_iso
+            ]
         
-        self.save_chat_history()
-        self.save_analytics_data()
\ No newline at end of file
+            self.save_chat_history()
+            self.save_analytics_data()
\ No newline at end of file
@@ -3,6 +3,7 @@
 Fix script to resolve intent classification issues
 """
 import os
+import shutil
 
 def fix_chatbot():
     """Fix the chatbot intent classification and response issues"""
@@ -12,6 +13,9 @@ def fix_chatbot():
     print("1️⃣ Clearing old data...")
     files_to_clear = [
         "data/chat_history.json",
+        "data/chat.sqlite",
+        "data/chat.sqlite-wal",
+        "data/chat.sqlite-shm",
         "data/analytics.json", 
         "models/intent_model.pkl"
     ]
@@ -21,6 +25,10 @@ def fix_chatbot():
             os.remove(file_path)
             print(f"   ✅ Cleared {file_path}")
     
+    if os.path.isdir("data/sessions"):
+        shutil.rmtree("data/sessions")
+        print("   ✅ Cleared data/sessions")
+    
     # Step 2: Test intent classification
     print("\n2️⃣ Testing intent classification...")
     try:
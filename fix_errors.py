@@ -2,12 +2,17 @@
 """
 Fix script for Layered AI Chatbot System errors
 """
+import os
 import subprocess
 import sys
 
+from backend.nltk_init import NLTK_DATA_DIR
+
 def fix_textblob():
     """Fix TextBlob corpora issue"""
     print("Downloading TextBlob corpora...")
+    # NLTK only downloads into a search-path directory that already exists
+    os.makedirs(NLTK_DATA_DIR, exist_ok=True)
     try:
         subprocess.check_call([sys.executable, "-m", "textblob.download_corpora"])
         print("✅ TextBlob corpora downloaded")
@@ -15,10 +20,10 @@ def fix_textblob():
         print("⚠️ TextBlob download failed, trying NLTK...")
         try:
             import nltk
-            nltk.download('brown')
-            nltk.download('punkt')
-            nltk.download('wordnet')
-            nltk.download('averaged_perceptron_tagger')
+            packages = ['brown', 'punkt', 'wordnet', 'averaged_perceptron_tagger']
+            # One downloader call fetches the index once; NLTK's shared downloader isn't thread-safe
+            if not nltk.download(packages, download_dir=NLTK_DATA_DIR, quiet=True):
+                raise RuntimeError("one or more packages could not be downloaded")
             print("✅ NLTK data downloaded")
         except Exception as e:
             print(f"❌ NLTK download failed: {e}")
@@ -1,10 +1,15 @@
 """
 Streamlit Frontend for Layered AI Chatbot System
 """
+import html
+import pickle
+import re
+import secrets
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
+from streamlit.errors import StreamlitAPIException
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import sys
 import os
@@ -13,8 +18,6 @@ import time
 # Add backend to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from backend.core import ChatbotCore
-
 # Page configuration
 st.set_page_config(
     page_title="Layered AI Chatbot",
@@ -95,55 +98,268 @@ st.markdown("""
 # Initialize chatbot
 @st.cache_resource
 def initialize_chatbot():
+    from backend.core import ChatbotCore
     return ChatbotCore()
 
+# Cached backend fetchers: the leading underscore keeps the chatbot out of the
+# cache key, and the message count invalidates entries when new turns arrive
+@st.cache_data(ttl=30, show_spinner=False)
+def _fetch_dashboard(_chatbot, user_id, days, n_msgs):
+    return _chatbot.get_analytics_dashboard(days=days)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _fetch_learning_insights(_chatbot, user_id, n_msgs):
+    return _chatbot.get_learning_insights()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _fetch_system_health(_chatbot, user_id, n_msgs):
+    return _chatbot.get_system_health()
+
+def _cache_key():
+    """Cache key arguments shared by the fetchers"""
+    return st.session_state.user_id, _message_serial()
+
+def _message_serial():
+    """Number of messages appended this session; unlike len(), keeps growing once the history is capped"""
+    return st.session_state.user_count + st.session_state.bot_count
+
+# Dashboard charts are rendered as static images: no hover reflows or toolbar
+PLOTLY_CONFIG = {"staticPlot": True, "displayModeBar": False}
+
+# Plotting libraries are only needed by the dashboards, so import them on first use
+@st.cache_resource
+def _plotly():
+    import pandas as pd
+    import plotly.express as px
+    return pd, px
+
+# Line charts are downsampled to this many points before plotting
+MAX_TREND_POINTS = 300
+
+def _lttb_indices(values, threshold):
+    """Largest-triangle-three-buckets downsampling; returns the indices to keep"""
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    
+    indices = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        
+        # Average of the next bucket is the third triangle vertex
+        next_bucket = values[end:next_end] or [values[n - 1]]
+        avg_x = (end + next_end - 1) / 2 if end < next_end else n - 1
+        avg_y = sum(next_bucket) / len(next_bucket)
+        
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((a - avg_x) * (values[j] - values[a]) - (a - j) * (avg_y - values[a]))
+            if area > best_area:
+                best, best_area = j, area
+        indices.append(best)
+        a = best
+    
+    indices.append(n - 1)
+    return indices
+
+# Figure builders take hashable column tuples so the figures are cached across
+# reruns; frames are built column-wise with explicit dtypes
+@st.cache_data(show_spinner=False)
+def _intent_pie(intents, counts):
+    import numpy as np
+    import pyarrow as pa
+    _, px = _plotly()
+    # plotly express reads Arrow tables natively, so no pandas frame is needed
+    intent_table = pa.table({
+        'Intent': pa.array(intents, pa.string()),
+        'Count': np.fromiter(counts, dtype=np.int32, count=len(counts))
+    })
+    return px.pie(intent_table, values='Count', names='Intent', 
+                  title="Intent Distribution")
+
+@st.cache_data(show_spinner=False)
+def _sentiment_bar(sentiments, percentages):
+    import numpy as np
+    import pyarrow as pa
+    _, px = _plotly()
+    sentiment_table = pa.table({
+        'Sentiment': pa.array(sentiments, pa.string()),
+        'Percentage': np.fromiter(percentages, dtype=np.float64, count=len(percentages))
+    })
+    colors = {'positive': '#2ecc71', 'negative': '#e74c3c', 'neutral': '#95a5a6'}
+    return px.bar(sentiment_table, x='Sentiment', y='Percentage',
+                  color='Sentiment', color_discrete_map=colors,
+                  title="Sentiment Distribution")
+
+@st.cache_data(show_spinner=False)
+def _strategy_bar(strategies, success_rates, total_attempts):
+    import numpy as np
+    pd, px = _plotly()
+    eff_df = pd.DataFrame({
+        'Strategy': pd.Series(strategies, dtype='string'),
+        'Success Rate': np.fromiter(success_rates, dtype=np.float32, count=len(success_rates)),
+        'Total Attempts': np.fromiter(total_attempts, dtype=np.int32, count=len(total_attempts))
+    })
+    return px.bar(eff_df, x='Strategy', y='Success Rate',
+                  title="Response Strategy Success Rates")
+
+@st.cache_data(show_spinner=False)
+def _accuracy_line(dates, accuracies):
+    import plotly.graph_objects as go
+    keep = _lttb_indices(accuracies, MAX_TREND_POINTS)
+    fig = go.Figure(go.Scattergl(
+        x=[dates[i] for i in keep],
+        y=[accuracies[i] for i in keep],
+        mode='lines'
+    ))
+    fig.update_layout(title="Model Accuracy Over Time",
+                      xaxis_title='date', yaxis_title='overall_accuracy')
+    return fig
+
+def _show_chart(fig, config=PLOTLY_CONFIG):
+    st.plotly_chart(fig, use_container_width=True, theme=None, config=config)
+
 # Initialize session state
 def initialize_session_state():
     if 'chatbot' not in st.session_state:
         st.session_state.chatbot = initialize_chatbot()
     
+    if 'user_id' not in st.session_state:
+        # The id lives in the URL, so a reload or bookmark resumes this user's own
+        # conversation; it is random so one user can't guess another's
+        user_id = st.query_params.get('uid', '')
+        if not USER_ID_PATTERN.fullmatch(user_id):
+            user_id = f"user_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(8)}"
+            st.query_params['uid'] = user_id
+        st.session_state.user_id = user_id
+    
     if 'messages' not in st.session_state:
-        st.session_state.messages = []
+        # Pick up the conversation this user had in an earlier session
+        saved = _load_saved_messages(st.session_state.user_id)
+        st.session_state.messages = deque(saved, maxlen=MAX_MESSAGES)
+        
+        # Running conversation counters, updated as messages are appended
+        reset_conversation_stats()
+        for message in st.session_state.messages:
+            if message['role'] == 'user':
+                st.session_state.user_count += 1
+            else:
+                record_bot_response(message.get('metadata', {}))
+
+# Chat history limits: messages kept per session, bubbles rendered inline,
+# and messages saved per user (the last 50 turns)
+MAX_MESSAGES = 200
+INLINE_MESSAGES = 50
+SAVED_MESSAGES = 100
+SESSION_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'sessions')
+
+# Only ids of this shape are accepted from the URL; they also name the saved file
+USER_ID_PATTERN = re.compile(r'user_\d{8}_\d{6}_[0-9a-f]{16}')
+
+def _session_file(user_id):
+    return os.path.join(SESSION_DIR, f"{user_id}.pkl")
+
+def _load_saved_messages(user_id):
+    """Messages saved for user_id by an earlier session, if any"""
+    try:
+        with open(_session_file(user_id), 'rb') as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return []
+
+def save_session(user_id, messages):
+    """Write the user's recent turns to their session file, or remove it once the chat is cleared"""
+    path = _session_file(user_id)
+    try:
+        if not messages:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        
+        # Written after each exchange instead of at exit, so nothing per session
+        # has to stay in memory once its tab is closed
+        os.makedirs(SESSION_DIR, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(list(islice(messages, max(len(messages) - SAVED_MESSAGES, 0), None)), f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Error saving chat session: {e}")
+
+def reset_conversation_stats():
+    """Reset the running counters used by the live metrics panel"""
+    st.session_state.user_count = 0
+    st.session_state.bot_count = 0
+    st.session_state.recent_bot = deque(maxlen=5)
+    st.session_state.recent_lines = deque(maxlen=5)
+
+SENTIMENT_EMOJIS = {"positive": "😊", "negative": "😞", "neutral": "😐"}
+
+def record_bot_response(response):
+    """Update the running counters with a new bot response"""
+    st.session_state.bot_count += 1
+    st.session_state.recent_bot.append(response)
     
-    if 'user_id' not in st.session_state:
-        st.session_state.user_id = f"user_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    # Pre-format the recent intent / sentiment lines once per response
+    sentiment = response.get('sentiment', {}).get('sentiment', 'neutral')
+    st.session_state.recent_lines.append((
+        f"• {response.get('intent', 'unknown')}",
+        f"• {SENTIMENT_EMOJIS.get(sentiment, '😐')} {sentiment}"
+    ))
+
+# Health panel layers: display name -> key in the system health dict
+HEALTH_LAYERS = (
+    ('Preprocessing', 'preprocessing_layer'),
+    ('NLP', 'nlp_layer'),
+    ('Sentiment', 'sentiment_layer'),
+    ('Decision Engine', 'decision_engine'),
+    ('Response', 'response_layer'),
+    ('Storage', 'storage_layer'),
+    ('Analytics', 'analytics_layer'),
+    ('Learning', 'learning_layer')
+)
+
+# Row markup is fixed, so only the status and its CSS class are filled in per render
+_HEALTH_TEMPLATE = "".join(
+    f'<div class="layer-status {{cls{i}}}">🔹 {layer_name}: {{st{i}}}</div>'
+    for i, (layer_name, _) in enumerate(HEALTH_LAYERS)
+)
+STATUS_CLASSES = {'operational': 'operational'}
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _health_html(statuses, api_status):
+    """Build the layer and API status block for the health panel"""
+    fmt = {f'cls{i}': STATUS_CLASSES.get(status, 'error') for i, status in enumerate(statuses)}
+    fmt.update({f'st{i}': status for i, status in enumerate(statuses)})
+    rows = _HEALTH_TEMPLATE.format(**fmt)
+    api_rows = "  \n".join(
+        f"{'🟢' if status == 'available' else '🟡'} {api.title()}: {status}"
+        for api, status in api_status
+    )
+    return f"{rows}\n\n**API Status:**  \n{api_rows}"
 
 def display_system_health():
     """Display system health status"""
-    health = st.session_state.chatbot.get_system_health()
+    health = _fetch_system_health(st.session_state.chatbot, *_cache_key())
     
     st.subheader("🔧 System Health")
     
-    # Layer status
-    layers = [
-        ('Preprocessing', health['preprocessing_layer']),
-        ('NLP', health['nlp_layer']),
-        ('Sentiment', health['sentiment_layer']),
-        ('Decision Engine', health['decision_engine']),
-        ('Response', health['response_layer']),
-        ('Storage', health['storage_layer']),
-        ('Analytics', health['analytics_layer']),
-        ('Learning', health['learning_layer'])
-    ]
-    
-    for layer_name, status in layers:
-        status_class = 'operational' if status == 'operational' else 'error'
-        st.markdown(f'<div class="layer-status {status_class}">🔹 {layer_name}: {status}</div>', 
-                   unsafe_allow_html=True)
-    
-    # API Status
-    st.write("**API Status:**")
-    api_status = health['api_status']
-    for api, status in api_status.items():
-        color = "🟢" if status == "available" else "🟡"
-        st.write(f"{color} {api.title()}: {status}")
+    # Layer and API status rendered as a single block
+    statuses = tuple(health[key] for _, key in HEALTH_LAYERS)
+    st.markdown(_health_html(statuses, tuple(health['api_status'].items())),
+               unsafe_allow_html=True)
 
 def display_analytics_dashboard():
     """Display comprehensive analytics dashboard"""
     st.subheader("📊 Analytics Dashboard")
     
     try:
-        dashboard_data = st.session_state.chatbot.get_analytics_dashboard(days=30)
+        user_id, n_msgs = _cache_key()
+        dashboard_data = _fetch_dashboard(st.session_state.chatbot, user_id, 30, n_msgs)
         
         # Key Metrics
         col1, col2, col3, col4 = st.columns(4)
@@ -171,44 +387,29 @@ def display_analytics_dashboard():
             # Intent Distribution
             intent_data = dashboard_data['intent_analytics']['intent_breakdown']
             if intent_data:
-                intent_df = pd.DataFrame([
-                    {'Intent': intent, 'Count': data['total_count']}
-                    for intent, data in intent_data.items()
-                ])
-                fig = px.pie(intent_df, values='Count', names='Intent', 
-                           title="Intent Distribution")
-                st.plotly_chart(fig, use_container_width=True)
+                fig = _intent_pie(
+                    tuple(intent_data),
+                    tuple(data['total_count'] for data in intent_data.values())
+                )
+                _show_chart(fig)
         
         with col2:
             # Sentiment Distribution
             sentiment_data = dashboard_data['sentiment_trends']['sentiment_distribution']
             if sentiment_data:
-                sentiment_df = pd.DataFrame([
-                    {'Sentiment': sentiment, 'Percentage': percentage}
-                    for sentiment, percentage in sentiment_data.items()
-                ])
-                colors = {'positive': '#2ecc71', 'negative': '#e74c3c', 'neutral': '#95a5a6'}
-                fig = px.bar(sentiment_df, x='Sentiment', y='Percentage',
-                           color='Sentiment', color_discrete_map=colors,
-                           title="Sentiment Distribution")
-                st.plotly_chart(fig, use_container_width=True)
+                fig = _sentiment_bar(tuple(sentiment_data), tuple(sentiment_data.values()))
+                _show_chart(fig)
         
         # Response Effectiveness
         st.subheader("🎯 Response Strategy Effectiveness")
         effectiveness_data = dashboard_data['response_effectiveness']['strategy_effectiveness']
         if effectiveness_data:
-            eff_df = pd.DataFrame([
-                {
-                    'Strategy': strategy,
-                    'Success Rate': data['success_rate'],
-                    'Total Attempts': data['total_attempts']
-                }
-                for strategy, data in effectiveness_data.items()
-            ])
-            
-            fig = px.bar(eff_df, x='Strategy', y='Success Rate',
-                        title="Response Strategy Success Rates")
-            st.plotly_chart(fig, use_container_width=True)
+            fig = _strategy_bar(
+                tuple(effectiveness_data),
+                tuple(data['success_rate'] for data in effectiveness_data.values()),
+                tuple(data['total_attempts'] for data in effectiveness_data.values())
+            )
+            _show_chart(fig)
         
         # System Insights
         insights = dashboard_data.get('insights', [])
@@ -226,7 +427,7 @@ def display_learning_insights():
     st.subheader("🧠 Learning Insights")
     
     try:
-        learning_data = st.session_state.chatbot.get_learning_insights()
+        learning_data = _fetch_learning_insights(st.session_state.chatbot, *_cache_key())
         
         # Optimization Suggestions
         suggestions = learning_data.get('optimization_suggestions', [])
@@ -247,15 +448,231 @@ def display_learning_insights():
         performance_trend = learning_data.get('model_performance_trend', [])
         if performance_trend:
             st.write("**Model Performance Trend (Last 7 Days):**")
-            perf_df = pd.DataFrame(performance_trend)
-            if not perf_df.empty:
-                fig = px.line(perf_df, x='date', y='overall_accuracy',
-                            title="Model Accuracy Over Time")
-                st.plotly_chart(fig, use_container_width=True)
+            fig = _accuracy_line(
+                tuple(point['date'] for point in performance_trend),
+                tuple(point['overall_accuracy'] for point in performance_trend)
+            )
+            # WebGL traces stay cheap on hover, so keep this chart interactive
+            _show_chart(fig, config={"staticPlot": False, "displayModeBar": False})
     
     except Exception as e:
         st.error(f"Error loading learning insights: {e}")
 
+def render_chat_history(messages, cache_key):
+    """Build the chat bubble HTML for messages, cached until new messages arrive"""
+    serial = _message_serial()
+    cached = st.session_state.get(cache_key)
+    if cached and cached[0] == serial:
+        return cached[1]
+    
+    # Bubbles are kept flush-left on one line each: markdown would treat indented
+    # lines as code, and a blank line inside the content would end the HTML block
+    html_parts = []
+    for message in messages:
+        content = "<br>".join(html.escape(message['content']).splitlines())
+        if message['role'] == 'user':
+            html_parts.append(
+                f'<div class="chat-message user-message"><strong>You:</strong> {content}</div>'
+            )
+        else:
+            # Display bot response with detailed metadata
+            metadata = message.get('metadata', {})
+            intent = html.escape(str(metadata.get('intent', 'unknown')))
+            sentiment = html.escape(str(metadata.get('sentiment', {}).get('sentiment', 'neutral')))
+            confidence = metadata.get('confidence', 0)
+            strategy = html.escape(str(metadata.get('strategy', 'unknown')))
+            processing_time = metadata.get('processing_time', 0)
+            
+            html_parts.append(
+                f'<div class="chat-message bot-message"><strong>AI Assistant:</strong> {content}<br>'
+                f'<small>Intent: {intent} | Sentiment: {sentiment} | '
+                f'Strategy: {strategy} | Confidence: {confidence:.1%} | '
+                f'Time: {processing_time:.2f}s</small></div>'
+            )
+    
+    chat_html = "\n".join(html_parts)
+    st.session_state[cache_key] = (serial, chat_html)
+    return chat_html
+
+@st.fragment
+def metrics_panel():
+    """Display live conversation and system metrics"""
+    st.subheader("📈 Live Metrics")
+    
+    # Current conversation stats
+    if st.session_state.messages:
+        recent_bot = st.session_state.recent_bot
+        
+        st.metric("Messages Exchanged", _message_serial())
+        st.metric("Your Messages", st.session_state.user_count)
+        st.metric("AI Responses", st.session_state.bot_count)
+        
+        # Recent processing details, intents and sentiments as one markdown block
+        sections = []
+        if recent_bot:
+            last_response = recent_bot[-1]
+            sections.append("  \n".join([
+                "**Last Response Details:**",
+                f"• Intent: {last_response.get('intent', 'N/A')}",
+                f"• Sentiment: {last_response.get('sentiment', {}).get('sentiment', 'N/A')}",
+                f"• Strategy: {last_response.get('strategy', 'N/A')}",
+                f"• Confidence: {last_response.get('confidence', 0):.1%}",
+                f"• Processing Time: {last_response.get('processing_time', 0):.2f}s",
+                f"• Success: {'✅' if last_response.get('success', False) else '❌'}"
+            ]))
+        
+        recent_lines = st.session_state.recent_lines
+        sections.append("  \n".join(["**Recent Intents:**"] + [intent for intent, _ in recent_lines]))
+        sections.append("  \n".join(["**Recent Sentiments:**"] + [sentiment for _, sentiment in recent_lines]))
+        st.markdown("\n\n".join(sections))
+    
+    # System performance
+    try:
+        health = _fetch_system_health(st.session_state.chatbot, *_cache_key())
+        metrics = health.get('system_metrics', {})
+        
+        st.subheader("🔧 System Metrics")
+        st.metric("Total Conversations", metrics.get('total_conversations', 0))
+        st.metric("Active Users", metrics.get('active_users', 0))
+        
+        model_status = "✅ Loaded" if metrics.get('intent_model_loaded', False) else "❌ Not Loaded"
+        st.write(f"**Intent Model:** {model_status}")
+        
+    except Exception as e:
+        st.error(f"Error loading system metrics: {e}")
+
+@st.fragment
+def chat_panel():
+    """Display the chat interface and live metrics column"""
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        st.subheader("💬 Chat Interface")
+        
+        # Display chat messages
+        messages = st.session_state.messages
+        older_count = max(len(messages) - INLINE_MESSAGES, 0)
+        chat_container = st.container()
+        with chat_container:
+            # Older messages are only rendered while their expander is open
+            if older_count:
+                older = st.expander(f"🕘 Older messages ({older_count})",
+                                    key="older_messages", on_change="rerun")
+                if older.open:
+                    older.markdown(render_chat_history(list(islice(messages, older_count)), 'older_chat_html'),
+                                   unsafe_allow_html=True)
+            
+            recent = list(islice(messages, older_count, None))
+            st.markdown(render_chat_history(recent, 'chat_html'), unsafe_allow_html=True)
+        
+        # Chat input
+        with st.form("chat_form", clear_on_submit=True):
+            user_input = st.text_input("Type your message here...", key="user_input")
+            col_send, col_clear = st.columns([1, 1])
+            
+            with col_send:
+                send_button = st.form_submit_button("Send 📤", use_container_width=True)
+            
+            with col_clear:
+                clear_button = st.form_submit_button("Clear Chat 🗑️", use_container_width=True)
+        
+        # Handle user input
+        if send_button and user_input:
+            # The sidebar feedback controls only render once there is a history
+            first_message = not st.session_state.messages
+            
+            # Add user message; the raw clock value is only formatted if it is ever displayed
+            st.session_state.messages.append({
+                'role': 'user',
+                'content': user_input,
+                'timestamp_ns': time.time_ns()
+            })
+            st.session_state.user_count += 1
+            
+            # Get bot response
+            with st.spinner("AI is processing through all layers..."):
+                response = st.session_state.chatbot.process_message(user_input, st.session_state.user_id)
+            
+            # Add bot response
+            st.session_state.messages.append({
+                'role': 'assistant',
+                'content': response['text'],
+                'timestamp': response['timestamp'],
+                'metadata': response
+            })
+            record_bot_response(response)
+            save_session(st.session_state.user_id, st.session_state.messages)
+            
+            # Only this fragment (chat + live metrics) needs to redraw, except on the first
+            # message, where the sidebar must appear; fall back to a full rerun when the
+            # fragment ran as part of the app
+            if first_message:
+                st.rerun()
+            try:
+                st.rerun(scope="fragment")
+            except StreamlitAPIException:
+                st.rerun()
+        
+        # Handle clear chat
+        if clear_button:
+            st.session_state.messages.clear()
+            st.session_state.pop('chat_html', None)
+            st.session_state.pop('older_chat_html', None)
+            reset_conversation_stats()
+            save_session(st.session_state.user_id, st.session_state.messages)
+            st.rerun()
+    
+    with col2:
+        metrics_panel()
+
+
+# Background system actions: session_state key -> (progress message, completion message)
+SYSTEM_ACTIONS = {
+    'opt_future': ("Optimizing system...", "System optimization completed!"),
+    'stats_future': ("Collecting statistics...", None)
+}
+
+@st.cache_resource
+def _action_pool():
+    """Shared worker pool for long-running system actions"""
+    return ThreadPoolExecutor(max_workers=2)
+
+@st.fragment(run_every=1)
+def _poll_system_actions():
+    """Show pending system actions and rerun the app when one finishes"""
+    for key, (progress_message, _) in SYSTEM_ACTIONS.items():
+        future = st.session_state.get(key)
+        if future is None:
+            continue
+        if future.done():
+            st.rerun()
+        st.info(progress_message)
+
+def display_system_actions():
+    """Display results of finished system actions, polling while any are running"""
+    pending = False
+    for key, (_, completion_message) in SYSTEM_ACTIONS.items():
+        future = st.session_state.get(key)
+        if future is None:
+            continue
+        if not future.done():
+            pending = True
+            continue
+        
+        del st.session_state[key]
+        try:
+            result = future.result()
+        except Exception as e:
+            st.error(f"System action failed: {e}")
+            continue
+        if completion_message:
+            st.success(completion_message)
+        st.json(result)
+    
+    if pending:
+        _poll_system_actions()
+
+
 def main():
     initialize_session_state()
     
@@ -267,6 +684,11 @@ def main():
     with st.sidebar:
         st.header("🎛️ Control Panel")
         
+        if st.button("🔄 Refresh Data"):
+            _fetch_dashboard.clear()
+            _fetch_learning_insights.clear()
+            _fetch_system_health.clear()
+        
         # System Health
         with st.expander("🔧 System Health", expanded=False):
             display_system_health()
@@ -281,14 +703,12 @@ def main():
         st.subheader("⚙️ System Actions")
         
         if st.button("🔄 Optimize System"):
-            with st.spinner("Optimizing system..."):
-                results = st.session_state.chatbot.optimize_system()
-                st.success("System optimization completed!")
-                st.json(results)
+            st.session_state.opt_future = _action_pool().submit(st.session_state.chatbot.optimize_system)
         
         if st.button("📈 Get Statistics"):
-            stats = st.session_state.chatbot.get_system_statistics()
-            st.json(stats)
+            st.session_state.stats_future = _action_pool().submit(st.session_state.chatbot.get_system_statistics)
+        
+        display_system_actions()
         
         # User Feedback
         st.subheader("📝 Feedback")
@@ -320,133 +740,7 @@ def main():
         display_learning_insights()
     else:
         # Chat Interface
-        col1, col2 = st.columns([3, 1])
-        
-        with col1:
-            st.subheader("💬 Chat Interface")
-            
-            # Display chat messages
-            chat_container = st.container()
-            with chat_container:
-                for i, message in enumerate(st.session_state.messages):
-                    if message['role'] == 'user':
-                        st.markdown(f"""
-                        <div class="chat-message user-message">
-                            <strong>You:</strong> {message['content']}
-                        </div>
-                        """, unsafe_allow_html=True)
-                    else:
-                        # Display bot response with detailed metadata
-                        metadata = message.get('metadata', {})
-                        intent = metadata.get('intent', 'unknown')
-                        sentiment = metadata.get('sentiment', {}).get('sentiment', 'neutral')
-                        confidence = metadata.get('confidence', 0)
-                        strategy = metadata.get('strategy', 'unknown')
-                        processing_time = metadata.get('processing_time', 0)
-                        
-                        st.markdown(f"""
-                        <div class="chat-message bot-message">
-                            <strong>AI Assistant:</strong> {message['content']}<br>
-                            <small>
-                                Intent: {intent} | Sentiment: {sentiment} | 
-                                Strategy: {strategy} | Confidence: {confidence:.1%} | 
-                                Time: {processing_time:.2f}s
-                            </small>
-                        </div>
-                        """, unsafe_allow_html=True)
-            
-            # Chat input
-            with st.form("chat_form", clear_on_submit=True):
-                user_input = st.text_input("Type your message here...", key="user_input")
-                col_send, col_clear = st.columns([1, 1])
-                
-                with col_send:
-                    send_button = st.form_submit_button("Send 📤", use_container_width=True)
-                
-                with col_clear:
-                    clear_button = st.form_submit_button("Clear Chat 🗑️", use_container_width=True)
-            
-            # Handle user input
-            if send_button and user_input:
-                # Add user message
-                st.session_state.messages.append({
-                    'role': 'user',
-                    'content': user_input,
-                    'timestamp': datetime.now().isoformat()
-                })
-                
-                # Get bot response
-                with st.spinner("AI is processing through all layers..."):
-                    response = st.session_state.chatbot.process_message(user_input, st.session_state.user_id)
-                
-                # Add bot response
-                st.session_state.messages.append({
-                    'role': 'assistant',
-                    'content': response['text'],
-                    'timestamp': response['timestamp'],
-                    'metadata': response
-                })
-                
-                st.rerun()
-            
-            # Handle clear chat
-            if clear_button:
-                st.session_state.messages = []
-                st.rerun()
-        
-        with col2:
-            st.subheader("📈 Live Metrics")
-            
-            # Current conversation stats
-            if st.session_state.messages:
-                user_messages = [msg for msg in st.session_state.messages if msg['role'] == 'user']
-                bot_messages = [msg for msg in st.session_state.messages if msg['role'] == 'assistant']
-                
-                st.metric("Messages Exchanged", len(st.session_state.messages))
-                st.metric("Your Messages", len(user_messages))
-                st.metric("AI Responses", len(bot_messages))
-                
-                # Recent processing details
-                if bot_messages:
-                    last_response = bot_messages[-1]['metadata']
-                    st.write("**Last Response Details:**")
-                    st.write(f"• Intent: {last_response.get('intent', 'N/A')}")
-                    st.write(f"• Sentiment: {last_response.get('sentiment', {}).get('sentiment', 'N/A')}")
-                    st.write(f"• Strategy: {last_response.get('strategy', 'N/A')}")
-                    st.write(f"• Confidence: {last_response.get('confidence', 0):.1%}")
-                    st.write(f"• Processing Time: {last_response.get('processing_time', 0):.2f}s")
-                    st.write(f"• Success: {'✅' if last_response.get('success', False) else '❌'}")
-                
-                # Recent intents
-                recent_intents = [msg['metadata'].get('intent', 'unknown') for msg in bot_messages[-5:]]
-                st.write("**Recent Intents:**")
-                for intent in recent_intents:
-                    st.write(f"• {intent}")
-                
-                # Recent sentiments
-                recent_sentiments = [
-                    msg['metadata'].get('sentiment', {}).get('sentiment', 'neutral') 
-                    for msg in bot_messages[-5:]
-                ]
-                st.write("**Recent Sentiments:**")
-                for sentiment in recent_sentiments:
-                    emoji = {"positive": "😊", "negative": "😞", "neutral": "😐"}.get(sentiment, "😐")
-                    st.write(f"• {emoji} {sentiment}")
-            
-            # System performance
-            try:
-                health = st.session_state.chatbot.get_system_health()
-                metrics = health.get('system_metrics', {})
-                
-                st.subheader("🔧 System Metrics")
-                st.metric("Total Conversations", metrics.get('total_conversations', 0))
-                st.metric("Active Users", metrics.get('active_users', 0))
-                
-                model_status = "✅ Loaded" if metrics.get('intent_model_loaded', False) else "❌ Not Loaded"
-                st.write(f"**Intent Model:** {model_status}")
-                
-            except Exception as e:
-                st.error(f"Error loading system metrics: {e}")
+        chat_panel()
 
 if __name__ == "__main__":
     main()
